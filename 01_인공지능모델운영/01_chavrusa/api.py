@@ -1,15 +1,35 @@
 """FastAPI backend that loads the stored Iris model and serves predictions."""
 
+import io
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
-import joblib
 import numpy as np
-from fastapi import APIRouter, FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from sklearn.datasets import load_iris
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
+
+from model_registry import DEFAULT_MODEL, ModelEntry, ModelRegistry, sources_from_env
+from prediction_cache import UI_GRID, GridPredictor
 
 MODEL_PATH = Path(__file__).resolve().parent / "iris_model.pkl"
+MODEL_POLL_SECONDS = float(os.environ.get("MODEL_POLL_SECONDS", "2"))
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", "100000"))
+FEATURE_NAMES = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+NPY_MEDIA_TYPE = "application/x-npy"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# A full float64 batch plus room for the .npy header or Arrow framing.
+MAX_BINARY_BODY_BYTES = int(
+    os.environ.get("MAX_BINARY_BODY_BYTES", str(MAX_BATCH_ROWS * len(FEATURE_NAMES) * 8 + 64 * 1024))
+)
+
+registry = ModelRegistry(sources_from_env(MODEL_PATH))
+grid_predictor = GridPredictor(
+    UI_GRID,
+    mode=os.environ.get("PREDICTION_CACHE", "table"),
+    lru_size=int(os.environ.get("PREDICTION_CACHE_SIZE", "4096")),
+)
 
 
 class IrisFeatures(BaseModel):
@@ -26,16 +46,54 @@ class PredictionResponse(BaseModel):
 
     prediction: str
     probabilities: Dict[str, float]
+    model: str
+    version: str
+
+
+class IrisColumns(BaseModel):
+    """Columnar batch payload: one array per feature, all the same length."""
+
+    sepal_length: List[float]
+    sepal_width: List[float]
+    petal_length: List[float]
+    petal_width: List[float]
+
+
+class BatchPredictionRequest(BaseModel):
+    """Either a list of feature records or a columnar payload."""
+
+    records: Optional[List[IrisFeatures]] = None
+    columns: Optional[IrisColumns] = None
+
+    @model_validator(mode="after")
+    def _one_payload(self) -> "BatchPredictionRequest":
+        if (self.records is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'records' or 'columns'")
+        return self
+
+
+class BatchPredictionResponse(BaseModel):
+    """Predictions and per-class probabilities as parallel arrays."""
+
+    predictions: List[str]
+    probabilities: Dict[str, List[float]]
+    model: str
+    version: str
 
 
 router = APIRouter()
 
 
-def load_model(path: Path = MODEL_PATH):
-    """Lazy-load the persisted classifier."""
-    if not path.exists():
-        raise FileNotFoundError(f"Model file not found at {path}")
-    return joblib.load(path)
+def warm_start() -> None:
+    """Load all models into memory and start watching their artifacts for new versions."""
+    registry.warm_start()
+    for entry in registry.active():
+        grid_predictor.warm(entry)
+    registry.start_watching(MODEL_POLL_SECONDS)
+
+
+def shutdown() -> None:
+    registry.stop_watching()
 
 
 @router.post(
@@ -44,26 +102,190 @@ def load_model(path: Path = MODEL_PATH):
     summary="Predict the Iris species",
     description="Expose a POST endpoint for UI clients that submit feature values.",
 )
-def predict_species(features: IrisFeatures):
+def predict_species(features: IrisFeatures, model: str = DEFAULT_MODEL, version: Optional[str] = None):
     """Handle POST requests from UIs; raises HTTP 422 for invalid input."""
+    entry = _resolve_model(model, version)
+    values = [features.sepal_length, features.sepal_width, features.petal_length, features.petal_width]
+    # Slider inputs land on UI_GRID and are answered from the lookup table.
+    probs = grid_predictor.predict(entry, values, lambda e, array: predict_matrix(e, array)[1])
+    labels = _class_labels(entry)
+    return {
+        "prediction": labels[int(probs.argmax())],
+        "probabilities": {label: float(prob) for label, prob in zip(labels, probs)},
+        "model": entry.name,
+        "version": entry.version,
+    }
+
+
+@router.post(
+    "/predict/batch/",
+    response_model=BatchPredictionResponse,
+    summary="Predict many Iris samples in one call",
+    description="Accepts feature records or four feature arrays and scores them in one vectorized pass.",
+)
+def predict_batch(payload: BatchPredictionRequest, model: str = DEFAULT_MODEL, version: Optional[str] = None):
+    if payload.records is not None:
+        array = np.array(
+            [[getattr(record, name) for name in FEATURE_NAMES] for record in payload.records], dtype=float
+        ).reshape(-1, len(FEATURE_NAMES))
+    else:
+        array = _columns_to_matrix({name: getattr(payload.columns, name) for name in FEATURE_NAMES})
+    entry = _resolve_model(model, version)
+    labels, probs = predict_matrix(entry, _validate_matrix(array))
+    return {
+        "predictions": [labels[idx] for idx in probs.argmax(axis=1)],
+        "probabilities": {label: probs[:, col].tolist() for col, label in enumerate(labels)},
+        "model": entry.name,
+        "version": entry.version,
+    }
+
+
+@router.post(
+    "/predict/batch/binary",
+    summary="Batch prediction with a binary NumPy or Arrow body",
+    description=(
+        f"Send an (n, 4) float array as `{NPY_MEDIA_TYPE}` or an Arrow IPC stream with the four feature "
+        f"columns as `{ARROW_MEDIA_TYPE}`. NumPy requests get an (n, classes) float32 probability array "
+        "back with class names in `X-Class-Names`; Arrow requests get a prediction column plus one "
+        "probability column per class."
+    ),
+)
+async def predict_batch_binary(request: Request, model: str = DEFAULT_MODEL, version: Optional[str] = None):
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+        raise HTTPException(status_code=415, detail=f"Use {NPY_MEDIA_TYPE} or {ARROW_MEDIA_TYPE}")
+    body = await _read_body(request, MAX_BINARY_BODY_BYTES)
+    entry = _resolve_model(model, version)
+    if media_type == NPY_MEDIA_TYPE:
+        try:
+            # Only the .npy format: np.load would also accept .npz archives (and fail on broken zips).
+            array = np.lib.format.read_array(io.BytesIO(body), allow_pickle=False)
+        except (ValueError, EOFError, OSError) as exc:
+            # Empty, truncated or non-.npy bodies raise ValueError/EOFError, unreadable data OSError.
+            raise HTTPException(status_code=422, detail=f"Invalid .npy body: {exc}")
+        labels, probs = await run_in_threadpool(predict_matrix, entry, _validate_matrix(array))
+        buffer = io.BytesIO()
+        np.save(buffer, probs.astype(np.float32), allow_pickle=False)
+        headers = {"X-Class-Names": ",".join(labels), "X-Model": entry.name, "X-Model-Version": str(entry.version)}
+        return Response(content=buffer.getvalue(), media_type=NPY_MEDIA_TYPE, headers=headers)
+
+    pa = _require_pyarrow()
     try:
-        clf = load_model()
+        table = pa.ipc.open_stream(body).read_all()
+        columns = {name: table.column(name).to_numpy() for name in FEATURE_NAMES}
+    except (pa.ArrowException, KeyError) as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid Arrow body: {exc}")
+    labels, probs = await run_in_threadpool(predict_matrix, entry, _columns_to_matrix(columns))
+    result = pa.table(
+        {
+            "prediction": [labels[idx] for idx in probs.argmax(axis=1)],
+            **{label: probs[:, col].astype(np.float32) for col, label in enumerate(labels)},
+        }
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, result.schema) as writer:
+        writer.write_table(result)
+    headers = {"X-Model": entry.name, "X-Model-Version": str(entry.version)}
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+
+def predict_matrix(entry: ModelEntry, array: np.ndarray) -> Tuple[List[str], np.ndarray]:
+    """Score an (n, 4) matrix; returns class labels aligned with the probability columns."""
+    return _class_labels(entry), entry.model.predict_proba(array)
+
+
+def _class_labels(entry: ModelEntry) -> List[str]:
+    return [entry.class_names[int(label)] for label in entry.model.classes_]
+
+
+def _resolve_model(model: str, version: Optional[str]) -> ModelEntry:
+    try:
+        return registry.get(model, version)
     except FileNotFoundError as exc:
         raise HTTPException(status_code=500, detail=str(exc))
-    array = np.array(
-        [[features.sepal_length, features.sepal_width, features.petal_length, features.petal_width]]
-    )
-    preds = clf.predict(array)
-    probs = clf.predict_proba(array)[0]
-    target_names = {idx: name for idx, name in enumerate(load_iris().target_names)}
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """The request body, refusing with 413 as soon as it is known to exceed ``limit`` bytes."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail=f"Body exceeds {limit} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Body exceeds {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _columns_to_matrix(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    lengths = {name: len(values) for name, values in columns.items()}
+    if len(set(lengths.values())) > 1:
+        raise HTTPException(status_code=422, detail=f"Feature arrays differ in length: {lengths}")
+    for name, values in columns.items():
+        _require_numeric(np.asarray(values), name)
+    return _validate_matrix(np.column_stack([np.asarray(columns[name], dtype=float) for name in FEATURE_NAMES]))
+
+
+def _validate_matrix(array: np.ndarray) -> np.ndarray:
+    """Apply the ``IrisFeatures`` constraints to a whole batch at once."""
+    _require_numeric(array, "features")
+    if array.ndim != 2 or array.shape[1] != len(FEATURE_NAMES):
+        raise HTTPException(status_code=422, detail=f"Expected shape (n, {len(FEATURE_NAMES)}), got {array.shape}")
+    if not 0 < len(array) <= MAX_BATCH_ROWS:
+        raise HTTPException(status_code=422, detail=f"Batch size must be between 1 and {MAX_BATCH_ROWS}")
+    array = array.astype(float, copy=False)
+    invalid = ~(np.isfinite(array) & (array > 0))
+    if invalid.any():
+        rows, cols = np.nonzero(invalid)
+        detail = [{"row": int(r), "field": FEATURE_NAMES[c]} for r, c in zip(rows[:20], cols[:20])]
+        raise HTTPException(status_code=422, detail={"msg": "Features must be finite and > 0", "errors": detail})
+    return array
+
+
+def _require_numeric(array: np.ndarray, name: str) -> None:
+    # bool, signed/unsigned int and float cast to float safely; strings, objects and dates do not.
+    if array.dtype.kind not in "biuf":
+        raise HTTPException(status_code=422, detail=f"{name} must be numeric, got dtype {array.dtype}")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=415, detail="Arrow payloads need the 'pyarrow' package on the server")
+    return pa
+
+
+@router.get("/models/", summary="List resident model versions")
+def list_models() -> List[Dict]:
+    return registry.describe()
+
+
+@router.post("/models/reload", summary="Reload models whose artifacts changed on disk")
+def reload_models() -> List[Dict]:
+    return [entry.describe() for entry in registry.refresh()]
+
+
+@router.get("/health", summary="Liveness check used by the serving supervisor")
+def health() -> Dict:
+    models = registry.active()
     return {
-        "prediction": target_names[preds[0]],
-        "probabilities": {
-            target_names[idx]: float(prob) for idx, prob in enumerate(probs)
-        },
+        "status": "ok" if models else "degraded",
+        "pid": os.getpid(),
+        "models": {entry.name: entry.version for entry in models},
     }
 
 
+@router.get("/predict/cache/stats", summary="Hit ratio of the grid prediction cache")
+def prediction_cache_stats() -> Dict:
+    return grid_predictor.stats()
+
+
 app = FastAPI(
     title="Iris Prediction API",
     description="Expose /predict/ as a POST API for downstream UI clients.",
@@ -78,6 +300,8 @@ def root():
 
 
 app.include_router(router)
+app.add_event_handler("startup", warm_start)
+app.add_event_handler("shutdown", shutdown)
 
 
 if __name__ == "__main__":
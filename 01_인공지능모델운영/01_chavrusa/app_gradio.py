@@ -1,15 +1,118 @@
 """Gradio frontend that submits user inputs to the FastAPI backend."""
 
+import asyncio
+import logging
 import os
-from typing import Dict
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
 
 import gradio as gr
-import requests
+import httpx
+
+from prediction_cache import UI_GRID
+
+logger = logging.getLogger(__name__)
 
 FASTAPI_URL = os.environ.get("FASTAPI_URL", "http://127.0.0.1:8000/predict/")
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """Connection pool, retry and concurrency limits for calls to the backend."""
+
+    timeout: float = 7.0
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    retries: int = 2
+    backoff_seconds: float = 0.1
+    # Gradio events handled at once; each one holds at most one pooled connection.
+    concurrency_limit: int = 32
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        return cls(
+            timeout=float(os.environ.get("FASTAPI_TIMEOUT", cls.timeout)),
+            max_connections=int(os.environ.get("FASTAPI_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(os.environ.get("FASTAPI_MAX_KEEPALIVE", cls.max_keepalive_connections)),
+            retries=int(os.environ.get("FASTAPI_RETRIES", cls.retries)),
+            backoff_seconds=float(os.environ.get("FASTAPI_BACKOFF_SECONDS", cls.backoff_seconds)),
+            concurrency_limit=int(os.environ.get("GRADIO_CONCURRENCY", cls.concurrency_limit)),
+        )
+
+
+class PredictionClient:
+    """Long-lived keep-alive client for the prediction API.
+
+    The underlying ``httpx.AsyncClient`` is bound to the event loop that first
+    uses it, so it is created lazily inside Gradio's loop and rebuilt if a
+    different loop shows up.
+    """
 
+    def __init__(self, url: str, settings: ClientSettings) -> None:
+        self.url = url
+        self.settings = settings
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
-def predict_species(sepal_length: float, sepal_width: float, petal_length: float, petal_width: float):
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._discard_client()
+            self._client = httpx.AsyncClient(
+                timeout=self.settings.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections,
+                    max_keepalive_connections=self.settings.max_keepalive_connections,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    def _discard_client(self) -> None:
+        """Close the client of a previous loop on that loop; if it no longer runs, just drop it."""
+        old_client, old_loop = self._client, self._loop
+        self._client = self._loop = None
+        if old_client is None:
+            return
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(old_client.aclose(), old_loop)
+        else:
+            # Its connections belong to the dead loop and cannot be closed from this one.
+            logger.info("Dropping prediction client of a stopped event loop")
+
+    async def post_json(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST ``payload``; connection errors, timeouts and 502/503/504 are retried with backoff."""
+        client = self._get_client()
+        for attempt in range(self.settings.retries):
+            try:
+                response = await client.post(self.url, json=payload)
+            except httpx.TransportError as exc:  # includes timeouts
+                reason = repr(exc)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                reason = f"HTTP {response.status_code}"
+            delay = self.settings.backoff_seconds * 2**attempt * (0.5 + random.random())
+            logger.warning("Prediction request failed (%s); retrying in %.2fs", reason, delay)
+            await asyncio.sleep(delay)
+        response = await client.post(self.url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+settings = ClientSettings.from_env()
+client = PredictionClient(FASTAPI_URL, settings)
+
+
+async def predict_species(sepal_length: float, sepal_width: float, petal_length: float, petal_width: float):
     """Send measurements via POST to the FastAPI backend and parse the response."""
     payload = {
         "sepal_length": sepal_length,
@@ -17,23 +120,25 @@ def predict_species(sepal_length: float, sepal_width: float, petal_length: float
         "petal_length": petal_length,
         "petal_width": petal_width,
     }
-    response = requests.post(FASTAPI_URL, json=payload, timeout=7)
-    response.raise_for_status()
-    return _format_response(response.json())
+    return format_response(await client.post_json(payload))
 
 
-def _format_response(data: Dict[str, Dict]) -> str:
+def format_response(data: Dict[str, Dict]) -> str:
     prediction = data.get("prediction", "unknown")
     probabilities = data.get("probabilities", {})
     prob_str = "\n".join(f"{label}: {prob:.2%}" for label, prob in probabilities.items())
     return f"Predicted species: {prediction}\n\nProbabilities:\n{prob_str}"
 
 
-def build_interface() -> gr.Interface:
-    """Construct the Gradio interface for the mini-project."""
-    slider_kwargs = dict(minimum=0.0, maximum=10.0, step=0.1)
+def build_interface(predict_fn: Optional[Callable[..., Any]] = None) -> gr.Interface:
+    """Construct the Gradio interface for the mini-project.
+
+    ``predict_fn`` replaces the HTTP call; the mounted deployment passes one that
+    runs the prediction router in-process.
+    """
+    slider_kwargs = UI_GRID.slider_kwargs()
     return gr.Interface(
-        fn=predict_species,
+        fn=predict_fn or predict_species,
         inputs=[
             gr.Slider(label="Sepal Length", **slider_kwargs),
             gr.Slider(label="Sepal Width", **slider_kwargs),
@@ -43,13 +148,18 @@ def build_interface() -> gr.Interface:
         outputs=gr.Textbox(label="Prediction"),
         title="Iris Predictor",
         description="Enter measurements and let the FastAPI backend predict the Iris species.",
+        concurrency_limit=settings.concurrency_limit,
     )
 
 
 def main():
     """Launch the standalone Gradio client; set share=True to expose a public link."""
     interface = build_interface()
-    interface.launch(share=True, server_name="127.0.0.1", server_port=7860)
+    interface.launch(
+        share=os.environ.get("GRADIO_SHARE", "1") == "1",
+        server_name=os.environ.get("GRADIO_SERVER_NAME", "127.0.0.1"),
+        server_port=int(os.environ.get("GRADIO_SERVER_PORT", "7860")),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+"""Latency and throughput benchmark for the three Iris deployments.
+
+Each deployment is started locally in its own process tree, driven at the
+requested concurrency levels and shut down again:
+
+    api         uvicorn api:app (one worker)
+    mounted     uvicorn main_gradio_mount:app (FastAPI + Gradio in one process)
+    twoservers  gradio_fastapi_twoservers.py (API workers + Gradio process)
+
+    python benchmark_deployments.py --concurrency 1 8 32 --requests 2000
+    python benchmark_deployments.py --deployments api --model /tmp/candidate.pkl
+
+Results (p50/p95/p99 latency, throughput, CPU ms per request measured from
+/proc for the whole process tree) are written as JSON to ``--output``.
+Linux only; runs offline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from prediction_cache import UI_GRID
+
+BASE_DIR = Path(__file__).resolve().parent
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+@dataclass(frozen=True)
+class Deployment:
+    name: str
+    command: List[str]
+    # Prefix of the prediction router on the API port ("/api" when mounted).
+    prefix: str = ""
+    # URL of the Gradio app whose "/predict" function can be benchmarked too.
+    gradio_url: Optional[str] = None
+
+
+def deployments(api_port: int, gradio_port: int, workers: int) -> Dict[str, Deployment]:
+    uvicorn = [sys.executable, "-m", "uvicorn", "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning"]
+    twoservers = [
+        sys.executable, "gradio_fastapi_twoservers.py",
+        "--api-port", str(api_port),
+        "--gradio-port", str(gradio_port),
+        "--workers", str(workers),
+    ]
+    return {
+        "api": Deployment("api", uvicorn + ["api:app"]),
+        "mounted": Deployment(
+            "mounted", uvicorn + ["main_gradio_mount:app"], "/api", f"http://127.0.0.1:{api_port}/gradio/"
+        ),
+        "twoservers": Deployment("twoservers", twoservers, "", f"http://127.0.0.1:{gradio_port}/"),
+    }
+
+
+def process_tree_cpu_seconds(root_pid: int) -> float:
+    """User + system CPU time of ``root_pid`` and all of its live descendants."""
+    parents: Dict[int, int] = {}
+    cpu: Dict[int, float] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as handle:
+                stat = handle.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name; ppid is field 4, utime/stime 14/15.
+        fields = stat[stat.rindex(")") + 2 :].split()
+        pid = int(entry.name)
+        parents[pid] = int(fields[1])
+        cpu[pid] = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    tree, frontier = {root_pid}, [root_pid]
+    while frontier:
+        parent = frontier.pop()
+        children = [pid for pid, ppid in parents.items() if ppid == parent and pid not in tree]
+        tree.update(children)
+        frontier.extend(children)
+    return sum(cpu.get(pid, 0.0) for pid in tree)
+
+
+def summarize(latencies: List[float], wall_seconds: float, cpu_seconds: float, errors: int) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(values, 50)), 3) if count else None,
+        "p95_ms": round(float(np.percentile(values, 95)), 3) if count else None,
+        "p99_ms": round(float(np.percentile(values, 99)), 3) if count else None,
+        "throughput_rps": round(count / wall_seconds, 1) if wall_seconds else None,
+        "cpu_ms_per_request": round(cpu_seconds * 1000 / count, 4) if count else None,
+    }
+
+
+def make_inputs(count: int, offgrid_fraction: float, seed: int = 0) -> List[Dict[str, float]]:
+    """Slider-grid inputs (value 0 excluded, the API rejects it), optionally jittered off the grid."""
+    rng = np.random.default_rng(seed)
+    values = UI_GRID.values()[rng.integers(1, UI_GRID.size, size=(count, 4))]
+    jitter = rng.random(count) < offgrid_fraction
+    values[jitter] += rng.uniform(0.001, 0.049, size=(int(jitter.sum()), 4))
+    names = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+    return [dict(zip(names, map(float, row))) for row in values]
+
+
+async def drive_http(url: str, inputs: List[Dict[str, float]], concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(inputs)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            for payload in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=payload)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def drive_gradio(url: str, inputs: List[Dict[str, float]], concurrency: int):
+    """Call the Gradio ``/predict`` function through its queue with ``gradio_client``."""
+    from gradio_client import Client
+
+    clients = [Client(url, verbose=False) for _ in range(concurrency)]
+    chunks = [inputs[index::concurrency] for index in range(concurrency)]
+
+    def run(client, rows):
+        latencies, errors = [], 0
+        for row in rows:
+            start = time.perf_counter()
+            try:
+                client.predict(*row.values(), api_name="/predict")
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        return latencies, errors
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(run, clients, chunks))
+    return [value for latencies, _ in results for value in latencies], sum(errors for _, errors in results)
+
+
+def wait_until_healthy(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Deployment exited with code {process.returncode} before becoming healthy")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{url} did not become healthy within {timeout:.0f}s")
+
+
+def measure(target: Callable[[List[Dict[str, float]], int], tuple], root_pid: int, inputs, concurrency: int):
+    cpu_before = process_tree_cpu_seconds(root_pid)
+    start = time.perf_counter()
+    latencies, errors = target(inputs, concurrency)
+    wall = time.perf_counter() - start
+    return summarize(latencies, wall, process_tree_cpu_seconds(root_pid) - cpu_before, errors)
+
+
+def run_deployment(deployment: Deployment, args, env: Dict[str, str]) -> Dict[str, object]:
+    api_url = f"http://127.0.0.1:{args.api_port}{deployment.prefix}"
+    process = subprocess.Popen(deployment.command, cwd=BASE_DIR, env=env, start_new_session=True)
+    try:
+        wait_until_healthy(f"{api_url}/health", process)
+        result: Dict[str, object] = {
+            "command": " ".join(deployment.command),
+            "models": httpx.get(f"{api_url}/models/", timeout=5).json(),
+            "http": {},
+        }
+        inputs = make_inputs(args.requests, args.offgrid_fraction)
+
+        def http_target(rows, concurrency):
+            return asyncio.run(drive_http(f"{api_url}/predict/", rows, concurrency))
+
+        http_target(make_inputs(args.warmup, args.offgrid_fraction, seed=1), max(args.concurrency))
+        for concurrency in args.concurrency:
+            stats = measure(http_target, process.pid, inputs, concurrency)
+            result["http"][str(concurrency)] = stats
+            print(f"{deployment.name:>10} http   c={concurrency:<3} {stats}")
+
+        if args.gradio and deployment.gradio_url:
+            wait_until_healthy(deployment.gradio_url, process)
+            result["gradio"] = {}
+            for concurrency in args.concurrency:
+                target = lambda rows, c: drive_gradio(deployment.gradio_url, rows, c)  # noqa: E731
+                stats = measure(target, process.pid, inputs[: args.gradio_requests], concurrency)
+                result["gradio"][str(concurrency)] = stats
+                print(f"{deployment.name:>10} gradio c={concurrency:<3} {stats}")
+        return result
+    finally:
+        _stop(process)
+
+
+def _stop(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deployments", nargs="+", choices=("api", "mounted", "twoservers"),
+                        default=["api", "mounted", "twoservers"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--offgrid-fraction", type=float, default=0.0,
+                        help="Share of inputs moved off the slider grid (forces model evaluation)")
+    parser.add_argument("--model", type=Path, help="Artifact to serve instead of iris_model.pkl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="API workers for twoservers")
+    parser.add_argument("--gradio", action="store_true",
+                        help="Also benchmark the Gradio function path (needs gradio_client)")
+    parser.add_argument("--gradio-requests", type=int, default=200)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--gradio-port", type=int, default=8766)
+    parser.add_argument("--output", type=Path, default=BASE_DIR / "reports" / "benchmark_deployments.json")
+    args = parser.parse_args()
+
+    env = {**os.environ, "GRADIO_ANALYTICS_ENABLED": "False", "MODEL_POLL_SECONDS": "3600"}
+    if args.model:
+        env["IRIS_MODELS"] = f"iris={args.model.resolve()}"
+    available = deployments(args.api_port, args.gradio_port, args.workers)
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "offgrid_fraction": args.offgrid_fraction,
+            "workers": args.workers,
+            "model": str(args.model) if args.model else None,
+        },
+        "deployments": {name: run_deployment(available[name], args, env) for name in args.deployments},
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
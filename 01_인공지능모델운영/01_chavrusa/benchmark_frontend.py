@@ -0,0 +1,83 @@
+"""Compare the Gradio handler's in-process and loopback HTTP prediction paths.
+
+Starts the mounted app (``main_gradio_mount``) on a local port and times the
+two functions Gradio would call for a slider event:
+
+    python benchmark_frontend.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 4),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 4),
+    }
+
+
+def _start_server(port: int):
+    import uvicorn
+
+    import main_gradio_mount
+
+    server = uvicorn.Server(uvicorn.Config(main_gradio_mount.app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ["FASTAPI_URL"] = f"http://127.0.0.1:{args.port}/api/predict/"
+    server = _start_server(args.port)
+
+    import app_gradio
+    import main_gradio_mount
+    from prediction_cache import UI_GRID
+
+    # Random slider positions, excluding 0 which the API rejects.
+    rng = np.random.default_rng(0)
+    inputs = UI_GRID.values()[rng.integers(1, UI_GRID.size, size=(args.requests, 4))].tolist()
+
+    inprocess = []
+    for row in inputs:
+        start = time.perf_counter()
+        main_gradio_mount.predict_in_process(*row)
+        inprocess.append(time.perf_counter() - start)
+
+    async def run_http() -> List[float]:
+        samples = []
+        for row in inputs:
+            start = time.perf_counter()
+            await app_gradio.predict_species(*row)
+            samples.append(time.perf_counter() - start)
+        await app_gradio.client.aclose()
+        return samples
+
+    http = asyncio.run(run_http())
+    server.should_exit = True
+
+    results = {"inprocess": _summary(inprocess), "http_loopback": _summary(http)}
+    results["speedup_p50"] = round(results["http_loopback"]["p50_ms"] / results["inprocess"]["p50_ms"], 1)
+    for name, value in results.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
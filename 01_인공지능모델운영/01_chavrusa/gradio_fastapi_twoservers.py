@@ -1,29 +1,228 @@
-"""Example that launches FastAPI and Gradio as independent servers."""
+"""Launch FastAPI and Gradio as independently supervised server processes.
 
-from threading import Thread
+The prediction API runs under uvicorn with one worker process per CPU (the
+uvicorn master replaces crashed workers and rolls them on SIGHUP), and the
+Gradio client runs in its own process. This supervisor health-checks both
+over HTTP and restarts whichever stops answering.
 
-import uvicorn
+Signals:
+    SIGHUP           rolling restart of the API workers (reloads models and code)
+    SIGINT/SIGTERM   drain in-flight requests and stop everything
+"""
 
-from app_gradio import build_interface
-from api import app as fastapi_app
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
 
+logger = logging.getLogger("supervisor")
 
-def _run_fastapi():
-    """Start the FastAPI backend on 127.0.0.1:8000."""
-    uvicorn.run(fastapi_app, host="127.0.0.1", port=8000, log_level="info")
+BASE_DIR = Path(__file__).resolve().parent
 
 
-def _run_gradio():
-    """Start the Gradio frontend on 127.0.0.1:7860."""
-    interface = build_interface()
-    interface.launch(share=False, server_name="127.0.0.1", server_port=7860)
+@dataclass(frozen=True)
+class ServeConfig:
+    """Ports, process counts and health-check policy for the two-server stack."""
+
+    host: str = "127.0.0.1"
+    api_port: int = 8000
+    gradio_port: int = 7860
+    workers: int = os.cpu_count() or 1
+    health_interval: float = 2.0
+    # Consecutive failed checks before a running process is restarted.
+    health_failures: int = 3
+    # Time allowed to start answering health checks after a (re)start.
+    startup_grace: float = 30.0
+    graceful_timeout: float = 20.0
+    max_restart_backoff: float = 30.0
+
+
+@dataclass
+class ManagedProcess:
+    """One supervised child process and its health state."""
+
+    name: str
+    command: List[str]
+    health_url: str
+    env: Dict[str, str] = field(default_factory=dict)
+    process: Optional[subprocess.Popen] = None
+    started_at: float = 0.0
+    ready: bool = False
+    restart_at: Optional[float] = None
+    failures: int = 0
+    restarts: int = 0
+
+    def start(self) -> None:
+        logger.info("Starting %s: %s", self.name, " ".join(self.command))
+        # Own process group, so workers of a crashed uvicorn master can be reaped with it.
+        self.process = subprocess.Popen(
+            self.command, cwd=BASE_DIR, env={**os.environ, **self.env}, start_new_session=True
+        )
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        self.ready = False
+        self.failures = 0
+
+    def stop(self, timeout: float) -> None:
+        """SIGTERM and wait for the process to drain; SIGKILL its group if it does not exit in time."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning("%s did not exit within %.0fs; killing it", self.name, timeout)
+        self._kill_group()
+        self.process.wait()
+
+    def _kill_group(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def healthy(self, timeout: float = 2.0) -> bool:
+        try:
+            with urllib.request.urlopen(self.health_url, timeout=timeout) as response:
+                return response.status == 200
+        except (urllib.error.URLError, OSError):
+            return False
+
+
+class Supervisor:
+    """Keeps the API and Gradio processes running and answering."""
+
+    def __init__(self, config: ServeConfig) -> None:
+        self.config = config
+        api_url = f"http://{config.host}:{config.api_port}"
+        self.children = [
+            ManagedProcess(
+                name="api",
+                command=[
+                    sys.executable, "-m", "uvicorn", "api:app",
+                    "--host", config.host,
+                    "--port", str(config.api_port),
+                    "--workers", str(config.workers),
+                    "--timeout-graceful-shutdown", str(int(config.graceful_timeout)),
+                ],
+                health_url=f"{api_url}/health",
+            ),
+            ManagedProcess(
+                name="gradio",
+                command=[sys.executable, "app_gradio.py"],
+                health_url=f"http://{config.host}:{config.gradio_port}/",
+                env={
+                    "FASTAPI_URL": f"{api_url}/predict/",
+                    "GRADIO_SERVER_NAME": config.host,
+                    "GRADIO_SERVER_PORT": str(config.gradio_port),
+                    "GRADIO_SHARE": "0",
+                },
+            ),
+        ]
+        self._stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._reload)
+        for child in self.children:
+            child.start()
+        try:
+            while not self._stopping:
+                time.sleep(self.config.health_interval)
+                for child in self.children:
+                    if not self._stopping:
+                        self._check(child)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        logger.info("Draining and stopping all processes")
+        for child in reversed(self.children):
+            child.stop(self.config.graceful_timeout)
+
+    def _check(self, child: ManagedProcess) -> None:
+        if child.restart_at is not None:
+            if time.monotonic() >= child.restart_at:
+                child.start()
+            return
+        code = child.process.poll()
+        if code is not None:
+            logger.error("%s exited with code %s", child.name, code)
+            self._schedule_restart(child)
+            return
+        if child.healthy():
+            child.ready = True
+            child.failures = 0
+            return
+        if not child.ready and time.monotonic() - child.started_at < self.config.startup_grace:
+            return  # still booting
+        child.failures += 1
+        logger.warning("%s failed health check %d/%d", child.name, child.failures, self.config.health_failures)
+        if child.failures >= self.config.health_failures:
+            self._schedule_restart(child)
+
+    def _schedule_restart(self, child: ManagedProcess) -> None:
+        child.stop(self.config.graceful_timeout)
+        # Back off on crash loops; a process that stayed up for a while restarts quickly.
+        if time.monotonic() - child.started_at > self.config.max_restart_backoff:
+            child.restarts = 0
+        delay = min(self.config.max_restart_backoff, 0.5 * 2 ** child.restarts)
+        child.restarts += 1
+        child.restart_at = time.monotonic() + delay
+        logger.info("Restarting %s in %.1fs (restart #%d)", child.name, delay, child.restarts)
+
+    def _reload(self, signum, frame) -> None:
+        api = self.children[0]
+        if api.process is not None and api.process.poll() is None:
+            logger.info("Rolling restart of API workers")
+            # uvicorn replaces its workers one at a time, letting each drain first.
+            api.process.send_signal(signal.SIGHUP)
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+
+def parse_args() -> ServeConfig:
+    defaults = ServeConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--api-port", type=int, default=int(os.environ.get("API_PORT", defaults.api_port)))
+    parser.add_argument("--gradio-port", type=int, default=int(os.environ.get("GRADIO_PORT", defaults.gradio_port)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("API_WORKERS", defaults.workers)),
+        help="API worker processes (default: CPU count)",
+    )
+    parser.add_argument("--health-interval", type=float, default=defaults.health_interval)
+    parser.add_argument("--health-failures", type=int, default=defaults.health_failures)
+    parser.add_argument("--graceful-timeout", type=float, default=defaults.graceful_timeout)
+    args = parser.parse_args()
+    return ServeConfig(
+        host=args.host,
+        api_port=args.api_port,
+        gradio_port=args.gradio_port,
+        workers=max(1, args.workers),
+        health_interval=args.health_interval,
+        health_failures=args.health_failures,
+        graceful_timeout=args.graceful_timeout,
+    )
 
 
 def main():
-    """Run both servers concurrently to simulate separate frontend/backend deployments."""
-    api_thread = Thread(target=_run_fastapi, daemon=True)
-    api_thread.start()
-    _run_gradio()
+    """Run both servers as separate processes to simulate separate frontend/backend deployments."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    Supervisor(parse_args()).run()
 
 
 if __name__ == "__main__":
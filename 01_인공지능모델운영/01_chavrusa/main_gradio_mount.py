@@ -8,8 +8,24 @@ import gradio as gr
 import uvicorn
 from fastapi import FastAPI
 
+from api import IrisFeatures, predict_species
 from api import router as prediction_router
-from app_gradio import build_interface
+from api import shutdown, warm_start
+from app_gradio import build_interface, format_response
+
+# "inprocess" (default) calls the router logic directly; "http" keeps the loopback call.
+PREDICT_MODE = os.environ.get("GRADIO_PREDICT_MODE", "inprocess")
+
+
+def predict_in_process(sepal_length: float, sepal_width: float, petal_length: float, petal_width: float) -> str:
+    """Run the ``/api/predict/`` handler without the HTTP round trip; Gradio calls it from a worker thread."""
+    features = IrisFeatures(
+        sepal_length=sepal_length,
+        sepal_width=sepal_width,
+        petal_length=petal_length,
+        petal_width=petal_width,
+    )
+    return format_response(predict_species(features))
 
 
 def create_app() -> FastAPI:
@@ -17,7 +33,9 @@ def create_app() -> FastAPI:
     app = FastAPI(title="FastAPI + mounted Gradio")
     # Browsing /api/predict with GET will return 405; use POST from Swagger or /gradio.
     app.include_router(prediction_router, prefix="/api")
-    gradio_ui = build_interface()
+    app.add_event_handler("startup", warm_start)
+    app.add_event_handler("shutdown", shutdown)
+    gradio_ui = build_interface(predict_in_process if PREDICT_MODE == "inprocess" else None)
     gr.mount_gradio_app(app, gradio_ui, path="/gradio")
     return app
 
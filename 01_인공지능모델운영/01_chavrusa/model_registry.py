@@ -0,0 +1,192 @@
+"""In-memory registry of trained Iris models with versioned hot-swap."""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "iris"
+
+
+@dataclass(frozen=True)
+class ModelEntry:
+    """A loaded model version together with the metadata needed to serve it."""
+
+    name: str
+    # sha256 prefix of the artifact bytes: the same file gives the same version
+    # in every worker and across restarts.
+    version: str
+    model: Any
+    class_names: List[str]
+    path: Path
+    mtime_ns: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "path": str(self.path),
+            "class_names": self.class_names,
+            "metadata": self.metadata,
+        }
+
+
+VERSION_LENGTH = 12
+
+
+def load_artifact(path: Path) -> Dict[str, Any]:
+    """Unpickle a model artifact; bare estimators from older runs are wrapped on the fly.
+
+    The result carries ``version``, a hash of exactly the bytes that were unpickled.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Model file not found at {path}")
+    data = path.read_bytes()
+    version = hashlib.sha256(data).hexdigest()[:VERSION_LENGTH]
+    artifact = joblib.load(io.BytesIO(data))
+    if isinstance(artifact, dict) and "model" in artifact:
+        return {**artifact, "version": version}
+    from sklearn.datasets import load_iris
+
+    return {"model": artifact, "class_names": list(load_iris().target_names), "metadata": {}, "version": version}
+
+
+class ModelRegistry:
+    """Keeps every named model resident and swaps in new versions as artifacts change.
+
+    Readers always see a complete ``ModelEntry``: a reload builds the new entry
+    first and only then replaces the active version under the lock.
+    """
+
+    def __init__(self, sources: Dict[str, Path], *, keep_versions: int = 3) -> None:
+        self.sources = dict(sources)
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+        # Serializes loads, so concurrent first requests unpickle a model only once.
+        self._load_lock = threading.RLock()
+        self._versions: Dict[str, Dict[str, ModelEntry]] = {}
+        self._active: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def load(self, name: str) -> ModelEntry:
+        """Load ``name`` from its source path and make that version active."""
+        path = self.sources[name]
+        with self._load_lock:
+            mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+            artifact = load_artifact(path)
+            entry = ModelEntry(
+                name=name,
+                version=artifact["version"],
+                model=artifact["model"],
+                class_names=[str(label) for label in artifact["class_names"]],
+                path=path,
+                mtime_ns=mtime_ns,
+                metadata=artifact.get("metadata", {}),
+            )
+            with self._lock:
+                versions = self._versions.setdefault(name, {})
+                # Re-insert so an unchanged artifact counts as the newest version again.
+                versions.pop(entry.version, None)
+                versions[entry.version] = entry
+                self._active[name] = entry.version
+                for stale in list(versions)[: -self.keep_versions]:
+                    del versions[stale]
+        logger.info("Loaded model %s@%s from %s", name, entry.version, path)
+        return entry
+
+    def warm_start(self) -> None:
+        """Load every source that exists; missing ones are picked up by ``refresh``."""
+        for name, path in self.sources.items():
+            try:
+                self.load(name)
+            except FileNotFoundError:
+                logger.warning("Model %s not found at %s; waiting for an artifact", name, path)
+
+    def refresh(self) -> List[ModelEntry]:
+        """Reload models whose artifact changed on disk since the active version."""
+        reloaded = []
+        for name, path in self.sources.items():
+            if not path.exists():
+                continue
+            active = self._active_entry(name)
+            if active is not None and path.stat().st_mtime_ns == active.mtime_ns:
+                continue
+            try:
+                reloaded.append(self.load(name))
+            except Exception:  # keep serving the previous version on a bad artifact
+                logger.exception("Failed to reload model %s from %s", name, path)
+        return reloaded
+
+    def get(self, name: str = DEFAULT_MODEL, version: Optional[str] = None) -> ModelEntry:
+        if name not in self._active:
+            if name not in self.sources:
+                raise KeyError(f"Unknown model '{name}'")
+            with self._load_lock:
+                # Not warmed yet (or the artifact appeared later): load on first use,
+                # unless a concurrent request did while we waited.
+                if name not in self._active:
+                    self.load(name)
+        with self._lock:
+            versions = self._versions[name]
+            key = self._active[name] if version is None else version
+            if key not in versions:
+                raise KeyError(f"Model '{name}' has no version {version}")
+            return versions[key]
+
+    def active(self) -> List[ModelEntry]:
+        with self._lock:
+            return [self._versions[name][version] for name, version in self._active.items()]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {**entry.describe(), "active": entry.version == self._active.get(name)}
+                for name, versions in self._versions.items()
+                for entry in versions.values()
+            ]
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll artifact mtimes in a daemon thread and hot-swap changed models."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def _watch() -> None:
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _active_entry(self, name: str) -> Optional[ModelEntry]:
+        with self._lock:
+            version = self._active.get(name)
+            return None if version is None else self._versions[name][version]
+
+
+def sources_from_env(default_path: Path) -> Dict[str, Path]:
+    """Read ``IRIS_MODELS=name=path,other=path``; defaults to the trained Iris model."""
+    spec = os.environ.get("IRIS_MODELS")
+    if not spec:
+        return {DEFAULT_MODEL: default_path}
+    sources = {}
+    for item in spec.split(","):
+        name, _, path = item.partition("=")
+        sources[name.strip()] = Path(path.strip()).expanduser().resolve()
+    return sources
@@ -0,0 +1,229 @@
+"""Grid-snapped prediction cache for the inputs the Gradio sliders can produce.
+
+The sliders only emit values on a fixed lattice, so predictions for those
+inputs can be served from a precomputed table instead of the forest. The
+table is compressed per feature: a tree ensemble only compares each feature
+against its split thresholds, so every grid value between two consecutive
+thresholds yields the same prediction and shares one table row.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model_registry import ModelEntry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuantizationGrid:
+    """Evenly spaced values ``low, low + step, ..., high`` shared by every feature."""
+
+    low: float = 0.0
+    high: float = 10.0
+    step: float = 0.1
+
+    @property
+    def size(self) -> int:
+        return int(round((self.high - self.low) / self.step)) + 1
+
+    def values(self) -> np.ndarray:
+        return np.round(self.low + np.arange(self.size) * self.step, 10)
+
+    def snap(self, features: Sequence[float]) -> Optional[Tuple[int, ...]]:
+        """Grid indices for ``features``, or ``None`` if any value is off the grid."""
+        indices = []
+        for value in features:
+            position = (value - self.low) / self.step
+            index = int(round(position))
+            if not 0 <= index < self.size or abs(position - index) > 1e-6:
+                return None
+            indices.append(index)
+        return tuple(indices)
+
+    def slider_kwargs(self) -> Dict[str, float]:
+        return {"minimum": self.low, "maximum": self.high, "step": self.step}
+
+
+# Matches the sliders in ``app_gradio.build_interface``.
+UI_GRID = QuantizationGrid(0.0, 10.0, 0.1)
+
+
+class ProbabilityTable:
+    """Class probabilities for every grid point over compressed axes.
+
+    Values are kept exactly as ``predict_proba`` returns them, so a table hit
+    equals the uncached prediction bit for bit.
+    """
+
+    def __init__(self, axes: List[np.ndarray], probabilities: np.ndarray) -> None:
+        # axes[f][grid_index] -> row along feature f of ``probabilities``.
+        self.axes = axes
+        self.probabilities = probabilities
+
+    @classmethod
+    def build(
+        cls, entry: ModelEntry, grid: QuantizationGrid, *, max_cells: int = 2_000_000
+    ) -> Optional["ProbabilityTable"]:
+        """Precompute the table, or return ``None`` if the model or table size does not allow it."""
+        thresholds = _split_thresholds(entry.model, n_features=4)
+        if thresholds is None:
+            return None
+        values = grid.values()
+        # sklearn compares float32 inputs against the thresholds; bin the same way.
+        compared = values.astype(np.float32).astype(np.float64)
+        axes, representatives = [], []
+        for feature_thresholds in thresholds:
+            bins = np.searchsorted(feature_thresholds, compared, side="left")
+            unique_bins, first, inverse = np.unique(bins, return_index=True, return_inverse=True)
+            axes.append(inverse.astype(np.int32))
+            representatives.append(values[first])
+        shape = tuple(len(rep) for rep in representatives)
+        if int(np.prod(shape)) > max_cells:
+            logger.info("Prediction table for %s@%s needs %s cells; skipping", entry.name, entry.version, shape)
+            return None
+        mesh = np.stack(np.meshgrid(*representatives, indexing="ij"), axis=-1).reshape(-1, len(shape))
+        probs = entry.model.predict_proba(mesh)
+        return cls(axes, probs.reshape(*shape, probs.shape[1]))
+
+    def lookup(self, indices: Tuple[int, ...]) -> np.ndarray:
+        cell = tuple(axis[index] for axis, index in zip(self.axes, indices))
+        return self.probabilities[cell].copy()
+
+    @property
+    def nbytes(self) -> int:
+        return self.probabilities.nbytes + sum(axis.nbytes for axis in self.axes)
+
+
+def _split_thresholds(model, n_features: int) -> Optional[List[np.ndarray]]:
+    estimators = getattr(model, "estimators_", None)
+    if estimators is None and hasattr(model, "tree_"):
+        estimators = [model]
+    if estimators is None or not all(hasattr(tree, "tree_") for tree in estimators):
+        return None
+    thresholds = []
+    for feature in range(n_features):
+        per_tree = [tree.tree_.threshold[tree.tree_.feature == feature] for tree in estimators]
+        thresholds.append(np.unique(np.concatenate(per_tree)))
+    return thresholds
+
+
+class GridPredictor:
+    """Serves on-grid inputs from a table or LRU and everything else from the model.
+
+    ``mode`` is ``"table"`` (precomputed table with the LRU as fallback while it
+    builds or when it is too large), ``"lru"`` or ``"off"``.
+    """
+
+    def __init__(
+        self,
+        grid: QuantizationGrid = UI_GRID,
+        *,
+        mode: str = "table",
+        lru_size: int = 4096,
+        max_table_cells: int = 2_000_000,
+    ) -> None:
+        if mode not in ("table", "lru", "off"):
+            raise ValueError(f"Unknown prediction cache mode '{mode}'")
+        self.grid = grid
+        self.mode = mode
+        self.lru_size = lru_size
+        self.max_table_cells = max_table_cells
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._tables: Dict[Tuple[str, str], Optional[ProbabilityTable]] = {}
+        self._building: set = set()
+        self._counts = {"table_hits": 0, "lru_hits": 0, "misses": 0, "off_grid": 0}
+
+    def predict(
+        self,
+        entry: ModelEntry,
+        features: Sequence[float],
+        score: Callable[[ModelEntry, np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        """Return class probabilities (aligned with ``entry.model.classes_``) for one sample."""
+        indices = self.grid.snap(features) if self.mode != "off" else None
+        if indices is None:
+            self._count("off_grid" if self.mode != "off" else "misses")
+            return score(entry, np.array([features], dtype=float))[0]
+        key = (entry.name, entry.version)
+        if self.mode == "table":
+            table = self._table(entry)
+            if table is not None:
+                self._count("table_hits")
+                return table.lookup(indices)
+        lru_key = key + indices
+        with self._lock:
+            cached = self._lru.get(lru_key)
+            if cached is not None:
+                self._lru.move_to_end(lru_key)
+                self._counts["lru_hits"] += 1
+                return cached
+        probs = score(entry, np.array([features], dtype=float))[0]
+        with self._lock:
+            self._counts["misses"] += 1
+            self._lru[lru_key] = probs
+            if len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+        return probs
+
+    def warm(self, entry: ModelEntry) -> None:
+        """Build the table for ``entry`` synchronously (used at startup)."""
+        if self.mode == "table":
+            self._build(entry)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            counts = dict(self._counts)
+            tables = {
+                f"{name}@{version}": (None if table is None else table.nbytes)
+                for (name, version), table in self._tables.items()
+            }
+            lru_entries = len(self._lru)
+        served = sum(counts.values())
+        hits = counts["table_hits"] + counts["lru_hits"]
+        return {
+            "mode": self.mode,
+            "grid": {"low": self.grid.low, "high": self.grid.high, "step": self.grid.step},
+            **counts,
+            "hit_ratio": round(hits / served, 4) if served else 0.0,
+            "lru_entries": lru_entries,
+            "table_bytes": tables,
+        }
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _table(self, entry: ModelEntry) -> Optional[ProbabilityTable]:
+        key = (entry.name, entry.version)
+        with self._lock:
+            if key in self._tables:
+                return self._tables[key]
+            if key in self._building:
+                return None
+            self._building.add(key)
+        # Build off the request path; the LRU answers until the table is ready.
+        threading.Thread(target=self._build, args=(entry,), name="grid-table", daemon=True).start()
+        return None
+
+    def _build(self, entry: ModelEntry) -> None:
+        key = (entry.name, entry.version)
+        try:
+            table = ProbabilityTable.build(entry, self.grid, max_cells=self.max_table_cells)
+        except Exception:
+            logger.exception("Failed to build prediction table for %s@%s", *key)
+            table = None
+        with self._lock:
+            # Other versions of this model are no longer served from the table.
+            for stale in [k for k in self._tables if k[0] == entry.name and k[1] != entry.version]:
+                del self._tables[stale]
+            self._tables[key] = table
+            self._building.discard(key)
+        if table is not None:
+            logger.info("Prediction table for %s@%s ready (%d bytes)", entry.name, entry.version, table.nbytes)
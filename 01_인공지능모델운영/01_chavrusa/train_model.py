@@ -1,31 +1,208 @@
-"""Train and persist a simple Iris classifier."""
+"""Train and persist a simple Iris classifier.
 
+Candidate models are cross-validated in parallel, then timed one at a time
+for serving cost; the cheapest model within ``tolerance`` of the best CV
+accuracy is saved.
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 import joblib
+import numpy as np
+import sklearn
+from sklearn.base import BaseEstimator
 from sklearn.datasets import load_iris
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from sklearn.tree import DecisionTreeClassifier
 
 
 MODEL_PATH = Path(__file__).resolve().parent / "iris_model.pkl"
 
+# name -> factory; forests are listed at several sizes to trade accuracy for latency.
+CANDIDATES: Dict[str, Callable[[], BaseEstimator]] = {
+    **{
+        f"random_forest_{n}": (lambda n=n: RandomForestClassifier(n_estimators=n, random_state=42))
+        for n in (5, 10, 25, 50, 100)
+    },
+    **{
+        f"extra_trees_{n}": (lambda n=n: ExtraTreesClassifier(n_estimators=n, random_state=42))
+        for n in (10, 50)
+    },
+    "decision_tree_depth3": lambda: DecisionTreeClassifier(max_depth=3, random_state=42),
+    "decision_tree": lambda: DecisionTreeClassifier(random_state=42),
+    "logistic_regression": lambda: LogisticRegression(max_iter=1000),
+}
+
+
+@dataclass
+class CandidateResult:
+    """Accuracy and serving cost of one fitted candidate."""
+
+    name: str
+    estimator: str
+    params: Dict[str, object]
+    cv_accuracy: float
+    cv_std: float
+    test_accuracy: float = 0.0
+    single_row_ms: float = 0.0
+    batch_us_per_row: float = 0.0
+    artifact_bytes: int = 0
+
+
+def _cross_validate(name: str, X: np.ndarray, y: np.ndarray, folds: int) -> CandidateResult:
+    model = CANDIDATES[name]()
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    scores = cross_val_score(model, X, y, cv=cv, scoring="accuracy")
+    params = {key: value for key, value in model.get_params().items() if key in ("n_estimators", "max_depth")}
+    return CandidateResult(
+        name=name,
+        estimator=type(model).__name__,
+        params=params,
+        cv_accuracy=round(float(scores.mean()), 4),
+        cv_std=round(float(scores.std()), 4),
+    )
+
+
+def _measure_serving_cost(model: BaseEstimator, X: np.ndarray, *, repeats: int = 200) -> Dict[str, float]:
+    """Median single-row ``predict_proba`` latency, per-row batch latency and pickled size."""
+    row = X[:1]
+    model.predict_proba(row)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    batch = np.repeat(X, max(1, 10_000 // len(X)), axis=0)
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_seconds = time.perf_counter() - start
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return {
+        "single_row_ms": round(float(np.median(timings)) * 1000, 4),
+        "batch_us_per_row": round(batch_seconds / len(batch) * 1e6, 4),
+        "artifact_bytes": buffer.tell(),
+    }
+
 
-def train_and_save_model(output_path: Path = MODEL_PATH) -> None:
-    """Train a classifier on the Iris dataset and serialize the fitted model."""
+def select_model(results: List[CandidateResult], *, tolerance: float, objective: str) -> CandidateResult:
+    """Cheapest candidate whose CV accuracy is within ``tolerance`` of the best one."""
+    best = max(result.cv_accuracy for result in results)
+    eligible = [result for result in results if result.cv_accuracy >= best - tolerance]
+    if objective == "size":
+        key = lambda result: (result.artifact_bytes, result.single_row_ms)  # noqa: E731
+    else:
+        key = lambda result: (result.single_row_ms, result.artifact_bytes)  # noqa: E731
+    return min(eligible, key=key)
+
+
+def train_and_save_model(
+    output_path: Path = MODEL_PATH,
+    *,
+    tolerance: float = 0.01,
+    objective: str = "latency",
+    folds: int = 5,
+    n_jobs: int = -1,
+    candidates: Optional[List[str]] = None,
+) -> CandidateResult:
+    """Search the candidates, serialize the selected model and write the search report next to it."""
     iris = load_iris()
-    X_train, X_test, y_train, _ = train_test_split(
+    X_train, X_test, y_train, y_test = train_test_split(
         iris.data, iris.target, test_size=0.2, random_state=42, stratify=iris.target
     )
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
-    joblib.dump(clf, output_path)
-    print(f"Saved Iris model to {output_path}")
+    names = candidates or list(CANDIDATES)
+    # CV is embarrassingly parallel; timings below run serially so they are not skewed by contention.
+    results = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(_cross_validate)(name, X_train, y_train, folds) for name in names
+    )
+    fitted = {}
+    for result in results:
+        model = CANDIDATES[result.name]().fit(X_train, y_train)
+        result.test_accuracy = round(float(model.score(X_test, y_test)), 4)
+        for key, value in _measure_serving_cost(model, X_test).items():
+            setattr(result, key, value)
+        fitted[result.name] = model
+
+    chosen = select_model(results, tolerance=tolerance, objective=objective)
+    selection = {
+        "objective": objective,
+        "tolerance": tolerance,
+        "cv_folds": folds,
+        "chosen": chosen.name,
+        "candidates": [asdict(result) for result in sorted(results, key=lambda r: -r.cv_accuracy)],
+    }
+    clf = fitted[chosen.name]
+    artifact = {
+        "model": clf,
+        "class_names": list(iris.target_names),
+        "metadata": {
+            "estimator": chosen.estimator,
+            "params": chosen.params,
+            "candidate": chosen.name,
+            "cv_accuracy": chosen.cv_accuracy,
+            "test_accuracy": chosen.test_accuracy,
+            "single_row_ms": chosen.single_row_ms,
+            "batch_us_per_row": chosen.batch_us_per_row,
+            "artifact_bytes": chosen.artifact_bytes,
+            "selection": {key: selection[key] for key in ("objective", "tolerance", "cv_folds")},
+            "sklearn_version": sklearn.__version__,
+            "trained_at": datetime.now(timezone.utc).isoformat(),
+        },
+    }
+    # Write the report first: the watcher in model_registry reacts to the pickle changing.
+    report_path = output_path.with_suffix(".json")
+    report_path.write_text(json.dumps({**artifact["metadata"], "selection": selection}, indent=2))
+    save_artifact(artifact, output_path)
+    print(
+        f"Saved {chosen.name} to {output_path} "
+        f"(cv accuracy {chosen.cv_accuracy:.3f}, {chosen.single_row_ms:.3f} ms/row, {chosen.artifact_bytes} bytes)"
+    )
+    return chosen
+
+
+def save_artifact(artifact: dict, output_path: Path) -> None:
+    """Write to a temp file and rename so a serving process never reads a partial pickle."""
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 
 def main() -> None:
     """Entry point for standalone training runs."""
-    train_and_save_model()
+    parser = argparse.ArgumentParser(description="Train the Iris classifier with latency-aware model selection.")
+    parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01, help="Accepted CV accuracy drop from the best candidate"
+    )
+    parser.add_argument("--objective", choices=("latency", "size"), default="latency")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--candidates", nargs="+", choices=sorted(CANDIDATES), help="Restrict the search")
+    args = parser.parse_args()
+    train_and_save_model(
+        args.output,
+        tolerance=args.tolerance,
+        objective=args.objective,
+        folds=args.folds,
+        n_jobs=args.n_jobs,
+        candidates=args.candidates,
+    )
 
 
 if __name__ == "__main__":
@@ -57,8 +57,10 @@ class DataCache:
         self.enriched = pd.read_parquet(processed / "enriched_sales.parquet")
         self.enriched["order_date"] = pd.to_datetime(self.enriched["order_date"])
         self.order_history = (
-            self.enriched.groupby(
-                ["sales_order_id", "customer_id", "territory_id", "territory_name", "order_date", "online_order_flag"]
+            self.enriched.astype({"line_total": "float64"})
+            .groupby(
+                ["sales_order_id", "customer_id", "territory_id", "territory_name", "order_date", "online_order_flag"],
+                observed=True,
             )["line_total"]
             .sum()
             .reset_index()
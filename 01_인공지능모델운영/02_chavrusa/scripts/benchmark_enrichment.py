@@ -0,0 +1,75 @@
+"""Compare the pandas-merge and sqlite-join enrichment backends."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT / "src"))
+
+from chavrusa import data_access, data_pipeline, sql_enrichment  # noqa: E402
+from chavrusa.paths import PATHS  # noqa: E402
+from chavrusa.utils import save_dataframe, write_json  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark enriched_sales backends")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per backend")
+    parser.add_argument("--batch-rows", type=int, default=50_000, help="Batch size for the sql backend")
+    return parser.parse_args()
+
+
+def run_pandas(path: Path) -> int:
+    data_access.load_table.cache_clear()
+    enriched = data_pipeline.build_enriched_sales()
+    save_dataframe(enriched, path)
+    return len(enriched)
+
+
+def measure(fn: Callable[[], int], repeat: int) -> Dict[str, float]:
+    """Time ``repeat`` plain runs, then one traced run for peak Python heap usage."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    # tracemalloc slows allocation-heavy code, so it is kept out of the timed runs.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "best_seconds": round(min(timings), 3),
+        "mean_seconds": round(sum(timings) / len(timings), 3),
+        "peak_traced_mb": round(peak / 1024 / 1024, 1),
+    }
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+    args = parse_args()
+    data_pipeline.ensure_indexes()
+    pandas_path = PATHS.interim_dir / "enriched_sales_pandas.parquet"
+    sql_path = PATHS.interim_dir / "enriched_sales_sql.parquet"
+    results = {
+        "pandas_merge": measure(lambda: run_pandas(pandas_path), args.repeat),
+        "sqlite_join": measure(
+            lambda: sql_enrichment.export_enriched_sales(sql_path, batch_rows=args.batch_rows), args.repeat
+        ),
+    }
+    if results["pandas_merge"]["rows"] != results["sqlite_join"]["rows"]:
+        raise SystemExit(f"Row counts differ: {results}")
+    write_json(results, PATHS.reports_dir / "enrichment_benchmark.json")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
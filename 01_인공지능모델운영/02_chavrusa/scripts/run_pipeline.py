@@ -10,7 +10,8 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT / "src"))
 
-from chavrusa import data_pipeline  # noqa: E402
+from chavrusa import chunked, data_pipeline, db, sql_enrichment  # noqa: E402
+from chavrusa.paths import PATHS  # noqa: E402
 
 
 def parse_args() -> argparse.Namespace:
@@ -18,6 +19,28 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--force-download", action="store_true", help="Re-download source csv files")
     parser.add_argument("--skip-download", action="store_true", help="Skip downloading raw csv files")
     parser.add_argument("--skip-sqlite", action="store_true", help="Skip writing to sqlite")
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="Process order detail in customer partitions with bounded memory",
+    )
+    parser.add_argument(
+        "--max-memory-mb",
+        type=int,
+        default=chunked.ChunkingConfig.max_memory_mb,
+        help="Approximate peak memory budget for --chunked",
+    )
+    parser.add_argument(
+        "--enrichment",
+        choices=["pandas", "sql"],
+        default="pandas",
+        help="Join tables with pandas merges or with one indexed sqlite query streamed to parquet",
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Run EDA, RFM and model stages one after another instead of in a process pool",
+    )
     return parser.parse_args()
 
 
@@ -28,8 +51,20 @@ def main() -> None:
         data_pipeline.download_raw_tables(force=args.force_download)
     if not args.skip_sqlite:
         data_pipeline.load_into_sqlite()
-    enriched = data_pipeline.build_enriched_sales()
-    outputs = data_pipeline.export_curated_datasets(enriched)
+    if args.chunked:
+        outputs = chunked.run_chunked_pipeline(chunked.ChunkingConfig(max_memory_mb=args.max_memory_mb))
+    elif args.enrichment == "sql":
+        if args.skip_sqlite:
+            # The database may predate the join-key indexes; load_into_sqlite builds them otherwise.
+            data_pipeline.ensure_indexes()
+        enriched_path = PATHS.processed_dir / "enriched_sales.parquet"
+        sql_enrichment.export_enriched_sales(enriched_path)
+        outputs = {"enriched_sales": enriched_path}
+        outputs.update(data_pipeline.export_downstream_datasets(enriched_path, parallel=not args.sequential))
+    else:
+        enriched = data_pipeline.build_enriched_sales()
+        outputs = data_pipeline.export_curated_datasets(enriched, parallel=not args.sequential)
+    db.close_connections()
     logging.info("Generated artifacts: %s", outputs)
 
 
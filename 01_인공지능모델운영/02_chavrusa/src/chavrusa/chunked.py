@@ -0,0 +1,234 @@
+"""Bounded-memory pipeline execution over customer-partitioned chunks.
+
+Order detail is streamed out of sqlite one customer range at a time. Every
+partition holds complete customers, so per-customer order sequences and RFM
+inputs never straddle a chunk boundary; everything else is folded into small
+mergeable partial states.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import data_access, db, eda, modeling, rfm, schema
+from .data_pipeline import enrich_sales, export_eda_artifacts, export_model_artifacts, export_rfm_artifacts
+from .paths import PATHS
+from .utils import ParquetAppender
+
+logger = logging.getLogger(__name__)
+
+# Tables whose size does not grow with order volume; loaded once per run.
+STATIC_TABLES = {
+    "territory": "sales_salesterritory",
+    "state": "person_stateprovince",
+    "country": "person_countryregion",
+    "product": "production_product",
+    "subcategory": "production_productsubcategory",
+    "category": "production_productcategory",
+}
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """Memory budget for the out-of-core pipeline."""
+
+    max_memory_mb: int = 512
+    # Rough peak footprint of one enriched row, including merge temporaries.
+    bytes_per_row: int = 2048
+    # Cap on rows kept for model training; sampled uniformly across chunks.
+    max_training_rows: Optional[int] = 1_000_000
+    random_state: int = 42
+
+    @property
+    def chunk_rows(self) -> int:
+        return max(1, self.max_memory_mb * 1024 * 1024 // self.bytes_per_row)
+
+
+@dataclass
+class PartialAggregates:
+    """Mergeable running totals behind the EDA outputs."""
+
+    monthly: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    category: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    territory: pd.Series = field(default_factory=lambda: pd.Series(dtype=float))
+    total_revenue: float = 0.0
+    total_orders: int = 0
+    total_customers: int = 0
+    period_start: Optional[pd.Timestamp] = None
+    period_end: Optional[pd.Timestamp] = None
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        monthly = eda.monthly_sales(chunk).set_index("month")["line_total"]
+        category = eda.category_performance(chunk).set_index("category_name")["line_total"]
+        territory = eda.territory_performance(chunk).set_index("territory_name")["line_total"]
+        self.monthly = self.monthly.add(monthly, fill_value=0)
+        self.category = self.category.add(category, fill_value=0)
+        self.territory = self.territory.add(territory, fill_value=0)
+        self.total_revenue += float(chunk["line_total"].sum())
+        # Customers never span partitions, so neither do their orders.
+        self.total_orders += int(chunk["sales_order_id"].nunique())
+        self.total_customers += int(chunk["customer_id"].nunique())
+        start, end = chunk["order_date"].min(), chunk["order_date"].max()
+        self.period_start = start if self.period_start is None else min(self.period_start, start)
+        self.period_end = end if self.period_end is None else max(self.period_end, end)
+
+    def finalize(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict[str, object]]:
+        monthly = self.monthly.rename_axis("month").rename("line_total").reset_index().sort_values("month")
+        category = (
+            self.category.rename_axis("category_name")
+            .rename("line_total")
+            .reset_index()
+            .sort_values("line_total", ascending=False)
+        )
+        territory = (
+            self.territory.rename_axis("territory_name")
+            .rename("line_total")
+            .reset_index()
+            .sort_values("line_total", ascending=False)
+        )
+        summary = eda.summarize_totals(
+            total_revenue=self.total_revenue,
+            total_orders=self.total_orders,
+            total_customers=self.total_customers,
+            period_start=self.period_start,
+            period_end=self.period_end,
+        )
+        return monthly, category, territory, summary
+
+
+@dataclass
+class TrainingReservoir:
+    """Uniform sample of next-purchase features bounded to ``capacity`` rows."""
+
+    capacity: Optional[int]
+    random_state: int = 42
+    sample: Optional[pd.DataFrame] = None
+    _rng: np.random.Generator = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._rng = np.random.default_rng(self.random_state)
+
+    def update(self, features: pd.DataFrame) -> None:
+        features = features.assign(_sample_key=self._rng.random(len(features)))
+        merged = features if self.sample is None else pd.concat([self.sample, features], ignore_index=True)
+        if self.capacity is not None and len(merged) > self.capacity:
+            merged = merged.nsmallest(self.capacity, "_sample_key")
+        self.sample = merged
+
+    def finalize(self) -> pd.DataFrame:
+        if self.sample is None:
+            raise ValueError("No training rows were produced")
+        return self.sample.drop(columns="_sample_key").reset_index(drop=True)
+
+
+def plan_customer_partitions(chunk_rows: int) -> List[Tuple[int, int]]:
+    """Split customers into contiguous id ranges of roughly ``chunk_rows`` detail lines.
+
+    A single customer larger than ``chunk_rows`` still gets its own partition.
+    """
+    partitions: List[Tuple[int, int]] = []
+    start: Optional[int] = None
+    previous: Optional[int] = None
+    rows_in_partition = 0
+    with db.get_connection(readonly=True) as conn:
+        cursor = conn.execute(
+            """
+            SELECT h.customer_id, COUNT(*)
+            FROM sales_salesorderdetail AS d
+            JOIN sales_salesorderheader AS h ON h.sales_order_id = d.sales_order_id
+            GROUP BY h.customer_id
+            ORDER BY h.customer_id
+            """
+        )
+        for customer_id, line_count in cursor:
+            if start is not None and rows_in_partition + line_count > chunk_rows:
+                partitions.append((start, previous))
+                start, rows_in_partition = None, 0
+            if start is None:
+                start = customer_id
+            rows_in_partition += line_count
+            previous = customer_id
+    if start is not None:
+        partitions.append((start, previous))
+    return partitions
+
+
+def iter_enriched_chunks(partitions: List[Tuple[int, int]]) -> Iterator[pd.DataFrame]:
+    """Yield the enriched sales rows for each customer range in turn."""
+    static = {key: data_access.load_table(table) for key, table in STATIC_TABLES.items()}
+    for low, high in partitions:
+        bounds = (low, high)
+        tables = dict(static)
+        tables["sales_order_header"] = db.read_query(
+            "SELECT * FROM sales_salesorderheader WHERE customer_id BETWEEN ? AND ?", bounds
+        )
+        tables["sales_order_detail"] = db.read_query(
+            """
+            SELECT d.*
+            FROM sales_salesorderdetail AS d
+            JOIN sales_salesorderheader AS h ON h.sales_order_id = d.sales_order_id
+            WHERE h.customer_id BETWEEN ? AND ?
+            """,
+            bounds,
+        )
+        tables["customer"] = db.read_query(
+            "SELECT * FROM sales_customer WHERE customer_id BETWEEN ? AND ?", bounds
+        )
+        tables["address"] = db.read_query(
+            """
+            SELECT * FROM person_address
+            WHERE address_id IN (
+                SELECT ship_to_address_id FROM sales_salesorderheader WHERE customer_id BETWEEN ? AND ?
+            )
+            """,
+            bounds,
+        )
+        yield enrich_sales(tables)
+
+
+def run_chunked_pipeline(config: ChunkingConfig = ChunkingConfig()) -> Dict[str, Path]:
+    """Build the same artifacts as ``export_curated_datasets`` within a fixed memory budget."""
+    partitions = plan_customer_partitions(config.chunk_rows)
+    logger.info(
+        "Processing %d customer partitions of up to %d rows (%d MB budget)",
+        len(partitions),
+        config.chunk_rows,
+        config.max_memory_mb,
+    )
+    outputs: Dict[str, Path] = {}
+    enriched_path = PATHS.processed_dir / "enriched_sales.parquet"
+    aggregates = PartialAggregates()
+    reservoir = TrainingReservoir(config.max_training_rows, config.random_state)
+    rfm_parts: List[pd.DataFrame] = []
+    report = schema.MemoryReport()
+    with ParquetAppender(enriched_path) as writer:
+        for index, chunk in enumerate(iter_enriched_chunks(partitions), start=1):
+            logger.info("Partition %d/%d: %d rows", index, len(partitions), len(chunk))
+            compact = schema.apply_profile(chunk, schema.ENRICHED_SALES)
+            report.add(chunk, compact)
+            writer.write(compact)
+            aggregates.update(chunk)
+            rfm_parts.append(rfm.rfm_inputs(chunk))
+            reservoir.update(modeling.build_next_purchase_dataset(modeling.build_order_table(chunk)))
+    if writer.rows == 0:
+        raise ValueError("No order detail rows found in sqlite")
+    schema.write_report(report, schema.default_report_path(enriched_path))
+    outputs["enriched_sales"] = enriched_path
+
+    monthly, category, territory, summary = aggregates.finalize()
+    export_eda_artifacts(monthly, category, territory, summary, outputs)
+
+    # One small row per customer: the only state that grows with the customer base.
+    rfm_input = pd.concat(rfm_parts, ignore_index=True)
+    snapshot_date = aggregates.period_end + pd.Timedelta(days=1)
+    export_rfm_artifacts(rfm.score_rfm(rfm_input, snapshot_date), outputs)
+
+    export_model_artifacts(reservoir.finalize(), outputs)
+    return outputs
+
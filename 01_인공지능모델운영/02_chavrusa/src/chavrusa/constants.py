@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Tuple
 
 BASE_DATA_URL = "https://raw.githubusercontent.com/olafusimichael/AdventureWorksCSV/main"
 
@@ -14,21 +14,59 @@ class TableSpec:
 
     table_name: str
     source_file: str
+    primary_key: Tuple[str, ...] = ()
+    # Foreign-key / join columns that get a plain index after loading.
+    indexes: Tuple[str, ...] = ()
 
 
 TABLE_SPECS: List[TableSpec] = [
-    TableSpec("sales_salesorderheader", "Sales SalesOrderHeader.csv"),
-    TableSpec("sales_salesorderdetail", "Sales SalesOrderDetail.csv"),
-    TableSpec("sales_customer", "Sales Customer.csv"),
-    TableSpec("sales_salesterritory", "Sales SalesTerritory.csv"),
-    TableSpec("person_person", "Person Person.csv"),
-    TableSpec("person_address", "Person Address.csv"),
-    TableSpec("person_stateprovince", "Person StateProvince.csv"),
-    TableSpec("person_countryregion", "Person CountryRegion.csv"),
-    TableSpec("production_product", "Production Product.csv"),
-    TableSpec("production_productsubcategory", "Production ProductSubcategory.csv"),
-    TableSpec("production_productcategory", "Production ProductCategory.csv"),
-    TableSpec("sales_specialofferproduct", "Sales SpecialOfferProduct.csv"),
-    TableSpec("sales_store", "Sales Store.csv"),
+    TableSpec(
+        "sales_salesorderheader",
+        "Sales SalesOrderHeader.csv",
+        primary_key=("sales_order_id",),
+        indexes=("customer_id", "territory_id", "ship_to_address_id"),
+    ),
+    TableSpec(
+        "sales_salesorderdetail",
+        "Sales SalesOrderDetail.csv",
+        primary_key=("sales_order_detail_id",),
+        indexes=("sales_order_id", "product_id"),
+    ),
+    TableSpec("sales_customer", "Sales Customer.csv", primary_key=("customer_id",), indexes=("territory_id",)),
+    TableSpec("sales_salesterritory", "Sales SalesTerritory.csv", primary_key=("territory_id",)),
+    TableSpec("person_person", "Person Person.csv", primary_key=("business_entity_id",)),
+    TableSpec(
+        "person_address",
+        "Person Address.csv",
+        primary_key=("address_id",),
+        indexes=("state_province_id",),
+    ),
+    TableSpec(
+        "person_stateprovince",
+        "Person StateProvince.csv",
+        primary_key=("state_province_id",),
+        indexes=("country_region_code",),
+    ),
+    TableSpec("person_countryregion", "Person CountryRegion.csv", primary_key=("country_region_code",)),
+    TableSpec(
+        "production_product",
+        "Production Product.csv",
+        primary_key=("product_id",),
+        indexes=("product_subcategory_id",),
+    ),
+    TableSpec(
+        "production_productsubcategory",
+        "Production ProductSubcategory.csv",
+        primary_key=("product_subcategory_id",),
+        indexes=("product_category_id",),
+    ),
+    TableSpec("production_productcategory", "Production ProductCategory.csv", primary_key=("product_category_id",)),
+    TableSpec(
+        "sales_specialofferproduct",
+        "Sales SpecialOfferProduct.csv",
+        primary_key=("special_offer_id", "product_id"),
+        indexes=("product_id",),
+    ),
+    TableSpec("sales_store", "Sales Store.csv", primary_key=("business_entity_id",)),
 ]
 
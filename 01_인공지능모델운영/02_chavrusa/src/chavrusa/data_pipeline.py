@@ -3,20 +3,28 @@
 from __future__ import annotations
 
 import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import quote
 
 import pandas as pd
 import requests
 
-from . import data_access, db, eda, modeling, rfm
+from . import data_access, db, eda, modeling, rfm, schema
 from .constants import BASE_DATA_URL, TABLE_SPECS
 from .paths import PATHS
 from .utils import save_dataframe, to_snake_case, write_json
 
 logger = logging.getLogger(__name__)
 
+# Keys that are missing for some rows after the left joins; always stored as float64.
+NULLABLE_KEY_COLUMNS = ["person_id", "product_subcategory_id", "product_category_id"]
+
 
 def download_raw_tables(force: bool = False) -> None:
     """Download csv files from GitHub into the raw data directory."""
@@ -42,12 +50,32 @@ def load_into_sqlite() -> None:
         df.columns = [to_snake_case(col) for col in df.columns]
         logger.info("Writing %s (%d rows) to sqlite", spec.table_name, len(df))
         db.write_dataframe(df, spec.table_name, if_exists="replace")
+    ensure_indexes()
+
+
+def ensure_indexes() -> None:
+    """Index primary and join keys declared in ``TABLE_SPECS`` and refresh planner stats."""
+    for spec in TABLE_SPECS:
+        if not db.table_exists(spec.table_name):
+            continue
+        available = set(db.table_columns(spec.table_name))
+        if spec.primary_key and set(spec.primary_key) <= available:
+            db.create_index(spec.table_name, spec.primary_key, unique=True)
+        for column in spec.indexes:
+            if column in available:
+                db.create_index(spec.table_name, [column])
+            else:
+                logger.warning("Skipping index on missing column %s.%s", spec.table_name, column)
+    db.analyze()
 
 
 def build_enriched_sales() -> pd.DataFrame:
     """Create a denormalized sales dataset for downstream analytics."""
-    tables = data_access.load_sales_core()
+    return enrich_sales(data_access.load_sales_core())
 
+
+def enrich_sales(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Join fact/dimension frames keyed like ``data_access.load_sales_core``."""
     header = tables["sales_order_header"].copy()
     detail = tables["sales_order_detail"].copy()
     customer = tables["customer"]
@@ -116,21 +144,139 @@ def build_enriched_sales() -> pd.DataFrame:
     enriched = enriched[selected_columns].copy()
     enriched["order_date"] = pd.to_datetime(enriched["order_date"])
     enriched["ship_date"] = pd.to_datetime(enriched["ship_date"])
+    enriched[NULLABLE_KEY_COLUMNS] = enriched[NULLABLE_KEY_COLUMNS].astype(float)
     return enriched
 
 
-def export_curated_datasets(enriched: pd.DataFrame) -> Dict[str, Path]:
+@dataclass
+class BranchResult:
+    """Outcome of one downstream stage of ``export_curated_datasets``."""
+
+    name: str
+    seconds: float
+    outputs: Dict[str, Path] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def export_curated_datasets(
+    enriched: pd.DataFrame,
+    *,
+    parallel: bool = True,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Path]:
     """Persist curated datasets for use by the API layer."""
     outputs = {}
     enriched_path = PATHS.processed_dir / "enriched_sales.parquet"
-    save_dataframe(enriched, enriched_path)
+    schema.save_compact(enriched, enriched_path, schema.ENRICHED_SALES)
     outputs["enriched_sales"] = enriched_path
+    outputs.update(
+        export_downstream_datasets(
+            enriched_path,
+            enriched=None if parallel else enriched,
+            parallel=parallel,
+            max_workers=max_workers,
+        )
+    )
+    return outputs
+
+
+def export_downstream_datasets(
+    enriched_path: Path,
+    *,
+    enriched: Optional[pd.DataFrame] = None,
+    parallel: bool = True,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Path]:
+    """Run the EDA, RFM and model branches on an already written enriched parquet.
+
+    The branches only read the enriched data, so with ``parallel`` they run in
+    separate processes that each memory-map the columns they need instead of
+    receiving a pickled frame. Sequential runs reuse ``enriched`` when given.
+    """
+    if parallel:
+        workers = max_workers or min(len(BRANCHES), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_branch, name, enriched_path) for name in BRANCHES]
+            results = [future.result() for future in futures]
+    else:
+        source = enriched if enriched is not None else enriched_path
+        results = [_run_branch(name, source) for name in BRANCHES]
+
+    write_json(
+        {result.name: {"seconds": round(result.seconds, 3), "error": result.error} for result in results},
+        PATHS.processed_dir / "pipeline_timings.json",
+    )
+    outputs: Dict[str, Path] = {}
+    failures: List[str] = []
+    for result in results:
+        if result.error:
+            logger.error("Branch %s failed after %.2fs:\n%s", result.name, result.seconds, result.error)
+            failures.append(result.name)
+        else:
+            logger.info("Branch %s finished in %.2fs", result.name, result.seconds)
+            outputs.update(result.outputs)
+    if failures:
+        raise RuntimeError(f"Pipeline branches failed: {', '.join(failures)}")
+    return outputs
 
-    monthly = eda.monthly_sales(enriched)
-    category = eda.category_performance(enriched)
-    territory = eda.territory_performance(enriched)
-    summary = eda.compute_summary(enriched)
 
+def _eda_branch(enriched: pd.DataFrame, outputs: Dict[str, Path]) -> None:
+    export_eda_artifacts(
+        eda.monthly_sales(enriched),
+        eda.category_performance(enriched),
+        eda.territory_performance(enriched),
+        eda.compute_summary(enriched),
+        outputs,
+    )
+
+
+def _rfm_branch(enriched: pd.DataFrame, outputs: Dict[str, Path]) -> None:
+    export_rfm_artifacts(rfm.compute_rfm(enriched), outputs)
+
+
+def _model_branch(enriched: pd.DataFrame, outputs: Dict[str, Path]) -> None:
+    orders = modeling.build_order_table(enriched)
+    export_model_artifacts(modeling.build_next_purchase_dataset(orders), outputs)
+
+
+# Downstream stages and the enriched columns each one reads.
+BRANCHES: Dict[str, Callable[[pd.DataFrame, Dict[str, Path]], None]] = {
+    "eda": _eda_branch,
+    "rfm": _rfm_branch,
+    "model": _model_branch,
+}
+BRANCH_COLUMNS: Dict[str, List[str]] = {
+    "eda": ["sales_order_id", "customer_id", "order_date", "category_name", "territory_name", "line_total"],
+    "rfm": ["sales_order_id", "customer_id", "order_date", "line_total"],
+    "model": ["sales_order_id", "customer_id", "territory_id", "order_date", "online_order_flag", "line_total"],
+}
+
+
+def _run_branch(name: str, source: Union[Path, pd.DataFrame]) -> BranchResult:
+    """Run one branch and capture its timing; errors are returned rather than raised."""
+    start = time.perf_counter()
+    outputs: Dict[str, Path] = {}
+    try:
+        if isinstance(source, Path):
+            enriched = schema.widen_floats(
+                pd.read_parquet(source, columns=BRANCH_COLUMNS[name], memory_map=True)
+            )
+        else:
+            enriched = source
+        BRANCHES[name](enriched, outputs)
+    except Exception:  # reported per branch by the caller
+        return BranchResult(name, time.perf_counter() - start, error=traceback.format_exc())
+    return BranchResult(name, time.perf_counter() - start, outputs)
+
+
+def export_eda_artifacts(
+    monthly: pd.DataFrame,
+    category: pd.DataFrame,
+    territory: pd.DataFrame,
+    summary: Dict[str, object],
+    outputs: Dict[str, Path],
+) -> None:
+    """Write aggregate tables, figures and the summary json."""
     outputs["monthly_sales"] = PATHS.processed_dir / "monthly_sales.csv"
     outputs["category_sales"] = PATHS.processed_dir / "category_sales.csv"
     outputs["territory_sales"] = PATHS.processed_dir / "territory_sales.csv"
@@ -144,9 +290,11 @@ def export_curated_datasets(enriched: pd.DataFrame) -> Dict[str, Path]:
     write_json(summary, summary_path)
     outputs["summary"] = summary_path
 
-    rfm_df = rfm.compute_rfm(enriched)
+
+def export_rfm_artifacts(rfm_df: pd.DataFrame, outputs: Dict[str, Path]) -> None:
+    """Write customer RFM segments and the per-segment summary."""
     rfm_path = PATHS.processed_dir / "rfm_segments.parquet"
-    save_dataframe(rfm_df, rfm_path)
+    schema.save_compact(rfm_df, rfm_path, schema.RFM_SEGMENTS)
     outputs["rfm"] = rfm_path
     rfm_summary = (
         rfm_df.groupby("segment")["customer_id"]
@@ -163,19 +311,12 @@ def export_curated_datasets(enriched: pd.DataFrame) -> Dict[str, Path]:
         PATHS.processed_dir / "rfm_summary.json",
     )
 
-    orders = (
-        enriched.groupby(
-            ["sales_order_id", "customer_id", "territory_id", "order_date", "online_order_flag"]
-        )
-        .agg(total_due=("line_total", "sum"))
-        .reset_index()
-    )
-    artifacts = modeling.train_next_purchase_model(
-        modeling.build_next_purchase_dataset(orders)
-    )
+
+def export_model_artifacts(feature_df: pd.DataFrame, outputs: Dict[str, Path]) -> None:
+    """Train the next-purchase model and write its report."""
+    artifacts = modeling.train_next_purchase_model(feature_df)
     write_json(
         {"metrics": artifacts.metrics, "feature_columns": artifacts.feature_columns},
         PATHS.processed_dir / "model_report.json",
     )
     outputs["model"] = artifacts.model_path
-    return outputs
@@ -1,29 +1,124 @@
-"""SQLite helpers for AdventureWorks data."""
+"""SQLite helpers for AdventureWorks data.
+
+Connections are pooled per thread: each thread keeps one read connection
+(``query_only``) and one write connection for the lifetime of the process,
+so the page cache, parsed schema and prepared statements survive between
+calls.
+"""
 
 from __future__ import annotations
 
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Generator, Iterable, Tuple
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator, Iterable, Iterator, List, Optional, Sequence
 
 import pandas as pd
 
 from .paths import PATHS
 
 
-def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(PATHS.sqlite_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+@dataclass(frozen=True)
+class ConnectionSettings:
+    """Pragmas applied to every pooled connection."""
+
+    mmap_size: int = 256 * 1024 * 1024
+    # Page cache per connection in KiB (applied as a negative ``cache_size``).
+    cache_size_kib: int = 64 * 1024
+    temp_store: str = "MEMORY"
+    # Size of sqlite3's per-connection prepared statement cache.
+    cached_statements: int = 256
+
+
+class ConnectionManager:
+    """Hands out one read and one write connection per thread."""
+
+    def __init__(self, path: Path, settings: ConnectionSettings = ConnectionSettings()) -> None:
+        self.path = path
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._opened: List[sqlite3.Connection] = []
+
+    def connection(self, *, readonly: bool = False) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Connections inherited through fork must not be reused or closed by the child.
+            self._reset()
+        key = "reader" if readonly else "writer"
+        conn = getattr(self._local, key, None)
+        if conn is None:
+            conn = self._open(readonly)
+            setattr(self._local, key, conn)
+        return conn
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        settings = self.settings
+        conn = sqlite3.connect(
+            self.path,
+            cached_statements=settings.cached_statements,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size = {int(settings.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {-int(settings.cache_size_kib)}")
+        conn.execute(f"PRAGMA temp_store = {settings.temp_store}")
+        if readonly:
+            conn.execute("PRAGMA query_only = ON")
+        with self._lock:
+            self._opened.append(conn)
+        return conn
+
+    def close_all(self) -> None:
+        with self._lock:
+            opened, self._opened = self._opened, []
+        if self._pid == os.getpid():
+            for conn in opened:
+                conn.close()
+        self._local = threading.local()
+
+
+_manager: Optional[ConnectionManager] = None
+
+
+def get_manager() -> ConnectionManager:
+    global _manager
+    if _manager is None:
+        _manager = ConnectionManager(PATHS.sqlite_path)
+    return _manager
+
+
+def configure(settings: ConnectionSettings) -> None:
+    """Close pooled connections and reopen future ones with ``settings``."""
+    global _manager
+    if _manager is not None:
+        _manager.close_all()
+    _manager = ConnectionManager(PATHS.sqlite_path, settings)
+
+
+def close_connections() -> None:
+    if _manager is not None:
+        _manager.close_all()
 
 
 @contextmanager
-def get_connection() -> Generator[sqlite3.Connection, None, None]:
-    conn = _connect()
+def get_connection(*, readonly: bool = False) -> Generator[sqlite3.Connection, None, None]:
+    """Borrow this thread's pooled connection; open transactions end with the block."""
+    conn = get_manager().connection(readonly=readonly)
     try:
         yield conn
-    finally:
-        conn.close()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    if conn.in_transaction:
+        conn.commit()
 
 
 def write_dataframe(df: pd.DataFrame, table_name: str, *, if_exists: str = "replace") -> None:
@@ -32,15 +127,42 @@ def write_dataframe(df: pd.DataFrame, table_name: str, *, if_exists: str = "repl
 
 
 def read_query(query: str, params: Iterable = ()) -> pd.DataFrame:
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         return pd.read_sql_query(query, conn, params=params)
 
 
+def iter_query(query: str, params: Iterable = (), *, chunksize: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Stream a query result as DataFrames of at most ``chunksize`` rows."""
+    with get_connection(readonly=True) as conn:
+        yield from pd.read_sql_query(query, conn, params=params, chunksize=chunksize)
+
+
 def table_exists(table_name: str) -> bool:
-    with get_connection() as conn:
+    with get_connection(readonly=True) as conn:
         cursor = conn.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
             (table_name,),
         )
         return cursor.fetchone() is not None
 
+
+def table_columns(table_name: str) -> List[str]:
+    with get_connection(readonly=True) as conn:
+        return [row["name"] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+def create_index(table_name: str, columns: Sequence[str], *, unique: bool = False) -> str:
+    """Create an index over ``columns`` if it does not exist and return its name."""
+    index_name = f"{'ux' if unique else 'ix'}_{table_name}_{'_'.join(columns)}"
+    with get_connection() as conn:
+        conn.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} "
+            f"ON {table_name} ({', '.join(columns)})"
+        )
+    return index_name
+
+
+def analyze() -> None:
+    """Refresh planner statistics after bulk loads or index changes."""
+    with get_connection() as conn:
+        conn.execute("ANALYZE")
@@ -15,17 +15,31 @@ sns.set_theme(style="whitegrid")
 
 
 def compute_summary(enriched: pd.DataFrame) -> Dict[str, float]:
-    total_revenue = enriched["line_total"].sum()
-    total_orders = enriched["sales_order_id"].nunique()
-    total_customers = enriched["customer_id"].nunique()
+    return summarize_totals(
+        total_revenue=enriched["line_total"].sum(),
+        total_orders=enriched["sales_order_id"].nunique(),
+        total_customers=enriched["customer_id"].nunique(),
+        period_start=enriched["order_date"].min(),
+        period_end=enriched["order_date"].max(),
+    )
+
+
+def summarize_totals(
+    *,
+    total_revenue: float,
+    total_orders: int,
+    total_customers: int,
+    period_start: pd.Timestamp,
+    period_end: pd.Timestamp,
+) -> Dict[str, float]:
     avg_order_value = total_revenue / max(total_orders, 1)
     return {
         "total_revenue": round(float(total_revenue), 2),
         "total_orders": int(total_orders),
         "total_customers": int(total_customers),
         "avg_order_value": round(float(avg_order_value), 2),
-        "data_period_start": enriched["order_date"].min().date().isoformat(),
-        "data_period_end": enriched["order_date"].max().date().isoformat(),
+        "data_period_start": period_start.date().isoformat(),
+        "data_period_end": period_end.date().isoformat(),
     }
 
 
@@ -42,7 +56,7 @@ def monthly_sales(enriched: pd.DataFrame) -> pd.DataFrame:
 
 def category_performance(enriched: pd.DataFrame) -> pd.DataFrame:
     return (
-        enriched.groupby("category_name")["line_total"]
+        enriched.groupby("category_name", observed=True)["line_total"]
         .sum()
         .reset_index()
         .sort_values("line_total", ascending=False)
@@ -51,7 +65,7 @@ def category_performance(enriched: pd.DataFrame) -> pd.DataFrame:
 
 def territory_performance(enriched: pd.DataFrame) -> pd.DataFrame:
     return (
-        enriched.groupby("territory_name")["line_total"]
+        enriched.groupby("territory_name", observed=True)["line_total"]
         .sum()
         .reset_index()
         .sort_values("line_total", ascending=False)
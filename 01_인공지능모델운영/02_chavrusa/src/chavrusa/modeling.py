@@ -23,6 +23,17 @@ class ModelArtifacts:
     metrics: Dict[str, float]
 
 
+def build_order_table(enriched: pd.DataFrame) -> pd.DataFrame:
+    """Collapses line items into one row per order with its total value."""
+    return (
+        enriched.groupby(
+            ["sales_order_id", "customer_id", "territory_id", "order_date", "online_order_flag"]
+        )
+        .agg(total_due=("line_total", "sum"))
+        .reset_index()
+    )
+
+
 def build_next_purchase_dataset(orders: pd.DataFrame) -> pd.DataFrame:
     """Constructs features for predicting days until the next purchase."""
     orders = orders.sort_values(["customer_id", "order_date"]).copy()
@@ -18,7 +18,12 @@ SEGMENT_RULES = {
 def compute_rfm(enriched: pd.DataFrame) -> pd.DataFrame:
     """Compute recency, frequency, and monetary scores for each customer."""
     snapshot_date = enriched["order_date"].max() + pd.Timedelta(days=1)
-    grouped = (
+    return score_rfm(rfm_inputs(enriched), snapshot_date)
+
+
+def rfm_inputs(enriched: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate last order, order count and spend per customer."""
+    return (
         enriched.groupby("customer_id")
         .agg(
             last_order=("order_date", "max"),
@@ -27,6 +32,11 @@ def compute_rfm(enriched: pd.DataFrame) -> pd.DataFrame:
         )
         .reset_index()
     )
+
+
+def score_rfm(grouped: pd.DataFrame, snapshot_date: pd.Timestamp) -> pd.DataFrame:
+    """Turn per-customer inputs into quintile scores and segment labels."""
+    grouped = grouped.copy()
     grouped["recency"] = (snapshot_date - grouped["last_order"]).dt.days
     grouped["recency_score"] = pd.qcut(grouped["recency"], 5, labels=[5, 4, 3, 2, 1]).astype(int)
     grouped["frequency_score"] = pd.qcut(grouped["frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5]).astype(int)
@@ -0,0 +1,191 @@
+"""Compact storage and in-memory dtypes for curated datasets.
+
+Profiles are applied when a dataset is written. Parquet keeps the pandas
+dtypes in its metadata, so ``pd.read_parquet`` returns the same compact
+frame to every consumer.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .utils import save_dataframe, write_json
+
+
+INTEGER_WIDTHS = (8, 16, 32, 64)
+
+
+@dataclass(frozen=True)
+class DatasetProfile:
+    """Declared dtypes for one curated dataset.
+
+    ``dtypes`` maps columns to pandas dtypes; columns not listed keep their
+    dtype. float32 columns are checked against ``float_tolerance``. Integer
+    widths are minimums: a column whose values do not fit is widened to the
+    narrowest integer type that holds them, keeping nullability.
+    """
+
+    name: str
+    dtypes: Mapping[str, str]
+    float_tolerance: float = 0.005
+
+
+ENRICHED_SALES = DatasetProfile(
+    "enriched_sales",
+    {
+        "sales_order_id": "int32",
+        "sales_order_detail_id": "int32",
+        "customer_id": "int32",
+        "person_id": "Int32",
+        "territory_id": "int8",
+        "territory_name": "category",
+        "online_order_flag": "int8",
+        # Order level totals exceed float32's half-cent resolution.
+        "total_due": "float64",
+        "sub_total": "float64",
+        "tax_amt": "float32",
+        "freight": "float32",
+        "ship_to_address_id": "int32",
+        "city": "category",
+        "state_name": "category",
+        "country_name": "category",
+        "postal_code": "category",
+        "product_id": "int16",
+        "product_name": "category",
+        "product_number": "category",
+        "product_subcategory_id": "Int16",
+        "subcategory_name": "category",
+        "product_category_id": "Int8",
+        "category_name": "category",
+        "order_qty": "int16",
+        "unit_price": "float32",
+        "unit_price_discount": "float32",
+        # Summed into every revenue figure; float32 rounding would shift totals by cents.
+        "line_total": "float64",
+    },
+)
+
+RFM_SEGMENTS = DatasetProfile(
+    "rfm_segments",
+    {
+        "customer_id": "int32",
+        "frequency": "int32",
+        "monetary": "float64",
+        "recency": "int32",
+        "recency_score": "int8",
+        "frequency_score": "int8",
+        "monetary_score": "int8",
+        "segment": "category",
+    },
+)
+
+
+@dataclass
+class MemoryReport:
+    """Accumulated bytes per column before and after applying a profile."""
+
+    before: Dict[str, int] = field(default_factory=dict)
+    after: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, before: pd.DataFrame, after: pd.DataFrame) -> None:
+        for column, size in before.memory_usage(deep=True, index=False).items():
+            self.before[column] = self.before.get(column, 0) + int(size)
+        for column, size in after.memory_usage(deep=True, index=False).items():
+            self.after[column] = self.after.get(column, 0) + int(size)
+
+    def to_dict(self) -> Dict[str, object]:
+        columns = {
+            column: {"before_bytes": self.before[column], "after_bytes": self.after.get(column, 0)}
+            for column in self.before
+        }
+        total_before = sum(self.before.values())
+        total_after = sum(self.after.values())
+        return {
+            "columns": columns,
+            "total_before_bytes": total_before,
+            "total_after_bytes": total_after,
+            "reduction_ratio": round(1 - total_after / total_before, 4) if total_before else 0.0,
+        }
+
+
+def apply_profile(df: pd.DataFrame, profile: DatasetProfile) -> pd.DataFrame:
+    """Return a copy of ``df`` cast to the profile, raising if a cast would lose data."""
+    compact = df.copy()
+    for column, dtype in profile.dtypes.items():
+        if column not in compact.columns:
+            continue
+        compact[column] = _cast_column(compact[column], dtype, profile.float_tolerance)
+    return compact
+
+
+def _cast_column(series: pd.Series, dtype: str, float_tolerance: float) -> pd.Series:
+    if dtype == "category":
+        return series.astype("category")
+    target = pd.api.types.pandas_dtype(dtype)
+    if pd.api.types.is_integer_dtype(target):
+        values = series.dropna()
+        if len(values) and not np.array_equal(values, np.round(values)):
+            raise ValueError(f"{series.name} has non-integer values")
+        if series.hasnans and not isinstance(target, pd.api.extensions.ExtensionDtype):
+            raise ValueError(f"{series.name} has missing values; use a nullable {dtype.capitalize()}")
+        return series.astype(_fitting_integer(values, target, series.name))
+    if target == np.float32:
+        cast = series.astype(np.float32)
+        error = (cast.astype(np.float64) - series).abs().max()
+        if pd.notna(error) and error > float_tolerance:
+            raise ValueError(f"{series.name} loses {error:.6f} as float32 (tolerance {float_tolerance})")
+        return cast
+    return series.astype(target)
+
+
+def _fitting_integer(values: pd.Series, declared, name: object):
+    """The narrowest integer dtype at least as wide as ``declared`` that holds ``values``."""
+    nullable = isinstance(declared, pd.api.extensions.ExtensionDtype)
+    numpy_dtype = np.dtype(declared.numpy_dtype if nullable else declared)
+    if not len(values):
+        return declared
+    low, high = values.min(), values.max()
+    for bits in INTEGER_WIDTHS:
+        if bits < numpy_dtype.itemsize * 8:
+            continue
+        info = np.iinfo(f"int{bits}")
+        if info.min <= low and high <= info.max:
+            return pd.api.types.pandas_dtype(f"Int{bits}" if nullable else f"int{bits}")
+    raise ValueError(f"{name} does not fit in int64")
+
+
+def widen_floats(df: pd.DataFrame) -> pd.DataFrame:
+    """Upcast float32 columns before aggregating so sums keep float64 precision."""
+    narrow = [column for column, dtype in df.dtypes.items() if dtype == np.float32]
+    if not narrow:
+        return df
+    return df.astype({column: np.float64 for column in narrow})
+
+
+def save_compact(
+    df: pd.DataFrame,
+    path: Path,
+    profile: DatasetProfile,
+    *,
+    report_path: Optional[Path] = None,
+) -> MemoryReport:
+    """Write ``df`` under ``profile`` plus a json memory report next to it."""
+    compact = apply_profile(df, profile)
+    report = MemoryReport()
+    report.add(df, compact)
+    save_dataframe(compact, path)
+    write_report(report, report_path or default_report_path(path))
+    return report
+
+
+def default_report_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}_dtypes.json")
+
+
+def write_report(report: MemoryReport, path: Path) -> None:
+    write_json(report.to_dict(), path)
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 
 def to_snake_case(value: str) -> str:
@@ -41,3 +43,99 @@ def save_dataframe(df: pd.DataFrame, path: Path) -> None:
     else:
         raise ValueError(f"Unsupported file extension for {path}")
 
+
+class ParquetAppender:
+    """Write a sequence of DataFrames to one parquet file under the first frame's schema.
+
+    Integer columns of a later frame that no longer fit the file's width (see
+    ``schema.apply_profile``) widen the file: the rows written so far are copied
+    into a new file under the wider schema, which then replaces the target.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._file = path
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._file, _concrete_schema(table.schema))
+        else:
+            wider = _widened_schema(self._writer.schema, table.schema)
+            if wider is not None:
+                self._rewrite(wider)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(df)
+
+    def _rewrite(self, schema: pa.Schema) -> None:
+        self._writer.close()
+        previous = self._file
+        self._file = self.path.with_name(f".{self.path.name}.tmp") if previous == self.path else self.path
+        self._writer = pq.ParquetWriter(self._file, schema)
+        for batch in pq.ParquetFile(previous).iter_batches():
+            self._writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+        previous.unlink()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._file != self.path:
+            self._file.replace(self.path)
+            self._file = self.path
+
+    def __enter__(self) -> "ParquetAppender":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _widened_schema(current: pa.Schema, incoming: pa.Schema) -> Optional[pa.Schema]:
+    """``current`` with integer columns widened to ``incoming``'s width, or None if nothing grew."""
+    widened = {}
+    for field in incoming:
+        index = current.get_field_index(field.name)
+        if index < 0:
+            continue
+        existing = current.field(index).type
+        if (
+            pa.types.is_integer(existing)
+            and pa.types.is_integer(field.type)
+            and field.type.bit_width > existing.bit_width
+        ):
+            widened[field.name] = field.type
+    if not widened:
+        return None
+    fields = [column.with_type(widened.get(column.name, column.type)) for column in current]
+    metadata = dict(current.metadata or {})
+    if b"pandas" in metadata:
+        # Keep read_parquet's dtype (e.g. nullable Int16) in step with the wider column.
+        pandas_metadata = json.loads(metadata[b"pandas"])
+        for column in pandas_metadata.get("columns", []):
+            if column.get("name") in widened:
+                bits = widened[column["name"]].bit_width
+                nullable = str(column.get("numpy_type", "")).startswith("Int")
+                column["numpy_type"] = f"Int{bits}" if nullable else f"int{bits}"
+                column["pandas_type"] = f"int{bits}"
+        metadata[b"pandas"] = json.dumps(pandas_metadata).encode("utf-8")
+    return pa.schema(fields, metadata=metadata)
+
+
+def _concrete_schema(schema: pa.Schema) -> pa.Schema:
+    """Make the first frame's schema castable from any later frame.
+
+    All-null columns become strings, and dictionary (categorical) columns get
+    int32 indices since later frames may carry more categories.
+    """
+    fields = []
+    for column in schema:
+        if pa.types.is_null(column.type):
+            column = column.with_type(pa.string())
+        elif pa.types.is_dictionary(column.type):
+            column = column.with_type(pa.dictionary(pa.int32(), column.type.value_type))
+        fields.append(column)
+    return pa.schema(fields, metadata=schema.metadata)
@@ -0,0 +1,116 @@
+"""Offline benchmark of the /rag chunk index against sending the whole file.
+
+Uploads a synthetic document with one planted fact per paragraph, asks for
+those facts and reports index build time, search latency, recall of the
+top-k passages, prompt size and end-to-end /rag latency with the fake model:
+
+    cd api
+    python benchmark_rag.py --paragraphs 2000 --queries 200
+
+Results are written as JSON to ``--output``. No API key or network needed.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+os.environ["GEMINI_MODEL"] = "fake"
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def synthetic_document(paragraphs: int, seed: int = 0) -> Tuple[str, List[Tuple[str, str]]]:
+    """Filler paragraphs with one planted fact each; returns the text and (question, answer) pairs."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(5000)]
+    facts = []
+    body = []
+    for index in range(paragraphs):
+        filler = " ".join(rng.choices(vocabulary, k=120))
+        answer = f"answer{index}"
+        body.append(f"{filler}. The codename of project item{index} is {answer}.")
+        facts.append((f"What is the codename of project item{index}?", answer))
+    return "\n\n".join(body), facts
+
+
+def percentiles(seconds: List[float]) -> Dict[str, float]:
+    values = np.asarray(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--output", type=Path, default=BASE_DIR.parent / "reports" / "benchmark_rag.json")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    os.environ.update(
+        UPLOAD_INDEX_PATH=str(workdir / "uploads.db"),
+        RAG_INDEX_PATH=str(workdir / "chunks.db"),
+        FAKE_FILES_DIR=str(workdir / "files"),
+        RAG_TOP_K=str(args.top_k),
+    )
+    from fastapi.testclient import TestClient
+
+    import main as api
+    from retrieval import estimate_tokens, tokenize
+
+    text, facts = synthetic_document(args.paragraphs)
+    client = TestClient(api.app)
+    start = time.perf_counter()
+    uploaded = client.post("/files", files={"file": ("bench.txt", text.encode("utf-8"), "text/plain")}).json()
+    upload_seconds = time.perf_counter() - start
+
+    sample = random.Random(1).sample(facts, min(args.queries, len(facts)))
+    search_latencies, rag_latencies, prompt_tokens = [], [], []
+    found = 0
+    document = api.chunk_index.document_for(uploaded["file_uri"])
+    for question, answer in sample:
+        start = time.perf_counter()
+        passages = api.chunk_index.search(question, sha256=document["sha256"], top_k=args.top_k)
+        search_latencies.append(time.perf_counter() - start)
+        found += any(answer in tokenize(passage.text) for passage in passages)
+
+        start = time.perf_counter()
+        response = client.post("/rag", json={"prompt": question, "file_uri": uploaded["file_uri"]}).json()
+        rag_latencies.append(time.perf_counter() - start)
+        prompt_tokens.append(response["retrieval"]["prompt_tokens_estimate"])
+
+    whole_file_tokens = estimate_tokens(text)
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {"paragraphs": args.paragraphs, "queries": len(sample), "top_k": args.top_k},
+        "document": {"bytes": len(text.encode("utf-8")), "tokens_estimate": whole_file_tokens, **api.chunk_index.stats()},
+        "upload_and_index_seconds": round(upload_seconds, 3),
+        "search": percentiles(search_latencies),
+        "rag_request": percentiles(rag_latencies),
+        "recall_at_k": round(found / len(sample), 4),
+        "prompt_tokens": {
+            "mean_with_index": round(float(np.mean(prompt_tokens)), 1),
+            "whole_file": whole_file_tokens,
+            "reduction": round(1 - float(np.mean(prompt_tokens)) / whole_file_tokens, 4),
+        },
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
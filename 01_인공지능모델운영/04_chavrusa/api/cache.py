@@ -0,0 +1,123 @@
+"""Response cache and single-flight deduplication for generation calls."""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def cache_key(*parts: Optional[str]) -> str:
+    """Stable digest of the model name, prompt and context."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """TTL + LRU cache of generated texts, optionally persisted to a sqlite file.
+
+    The in-memory map is authoritative while the process runs; the file only
+    lets a restarted server start warm.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 1024, path: Optional[Path] = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+        )
+        now = time.time()
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        rows = self._db.execute(
+            "SELECT key, expires_at, value FROM responses ORDER BY expires_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, expires_at, value in reversed(rows):
+            self._entries[key] = (expires_at, value)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                    (key, expires_at, value),
+                )
+                self._db.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in evicted])
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+            }
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight coroutine.
+
+    The shared work runs as its own task, so one caller giving up (timeout or
+    disconnect) does not cancel it for the others; it is cancelled only when
+    every caller has stopped waiting.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, Tuple["asyncio.Task", List[int]]] = {}
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run ``fn()`` once per key at a time; returns ``(result, shared)``."""
+        entry = self._inflight.get(key)
+        shared = entry is not None
+        if shared:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            entry = self._inflight[key] = (task, [0])
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                task.cancel()
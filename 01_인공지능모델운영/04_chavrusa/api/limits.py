@@ -0,0 +1,81 @@
+"""Bounded concurrency, deadlines and disconnect handling for upstream calls."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Dict, TypeVar
+
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+
+class QueueFull(Exception):
+    """Raised when more requests are waiting for a slot than the limiter allows."""
+
+
+class GenerationLimiter:
+    """Global cap on concurrent Gemini calls with a bounded wait queue."""
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.active = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{self.waiting} requests already waiting for Gemini")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+
+async def run_upstream(request: Request, work: Awaitable[T], *, timeout: float, poll_seconds: float = 0.25) -> T:
+    """Await ``work`` within ``timeout``, cancelling it if the client disconnects first.
+
+    Upstream errors are mapped to HTTP errors: 503 when the queue is full,
+    504 on deadline, 499 on disconnect and 500 for anything Gemini raises.
+    """
+    task = asyncio.ensure_future(work)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise HTTPException(status_code=504, detail=f"Gemini did not answer within {timeout:g}s")
+            done, _ = await asyncio.wait({task}, timeout=min(poll_seconds, remaining))
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    except QueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
+    except HTTPException:
+        raise
+    except Exception as exc:  # pragma: no cover - surface API errors clearly
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    finally:
+        if not task.done():
+            task.cancel()
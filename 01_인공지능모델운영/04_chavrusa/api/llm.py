@@ -0,0 +1,166 @@
+"""Model backends for the API: the real Gemini client or an offline fake.
+
+Set ``GEMINI_MODEL=fake`` to run the API, UI and benchmarks without a key or
+network access. The fake mirrors the parts of ``genai.GenerativeModel`` the
+API uses (``generate_content``, ``generate_content_async`` and
+``response.text``).
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from retrieval import estimate_tokens
+
+FAKE_MODEL_NAME = "fake"
+
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+    total_token_count: int
+
+
+@dataclass
+class FakeResponse:
+    text: str
+    # Like Gemini, only complete responses and the last streamed chunk carry usage.
+    usage_metadata: Optional[FakeUsage] = None
+
+
+class FakeModel:
+    """Deterministic stand-in that answers after ``latency`` seconds.
+
+    With ``stream=True`` the first chunk arrives after ``latency`` and the
+    remaining words follow every ``token_delay`` seconds.
+    """
+
+    def __init__(self, model_name: str = FAKE_MODEL_NAME, latency: float = 0.0, token_delay: float = 0.0) -> None:
+        self.model_name = model_name
+        self.latency = latency
+        self.token_delay = token_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt) -> FakeResponse:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        answer = self._answer(prompt)
+        return FakeResponse(answer, self._usage(prompt, answer))
+
+    async def generate_content_async(self, prompt, stream: bool = False):
+        with self._lock:
+            self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        answer = self._answer(prompt)
+        # A full completion costs as long as streaming every word would.
+        delay = self.latency + self.token_delay * answer.count(" ")
+        if delay:
+            await asyncio.sleep(delay)
+        return FakeResponse(answer, self._usage(prompt, answer))
+
+    async def _stream(self, prompt) -> AsyncIterator[FakeResponse]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        answer = self._answer(prompt)
+        words = answer.split(" ")
+        for index, word in enumerate(words):
+            if index and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            if index == len(words) - 1:
+                yield FakeResponse(word, self._usage(prompt, answer))
+            else:
+                yield FakeResponse(word + " ")
+
+    @staticmethod
+    def _text(prompt) -> str:
+        return prompt if isinstance(prompt, str) else "\n".join(str(part) for part in prompt)
+
+    @classmethod
+    def _usage(cls, prompt, answer: str) -> FakeUsage:
+        prompt_tokens, answer_tokens = estimate_tokens(cls._text(prompt)), estimate_tokens(answer)
+        return FakeUsage(prompt_tokens, answer_tokens, prompt_tokens + answer_tokens)
+
+    @classmethod
+    def _answer(cls, prompt) -> str:
+        text = cls._text(prompt)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+        return f"[fake:{digest}] {text[:200]}"
+
+
+@dataclass
+class FakeFile:
+    name: str
+    uri: str
+    display_name: str
+    path: Path
+
+    def __str__(self) -> str:
+        return self.path.read_text(encoding="utf-8", errors="replace")
+
+
+class FakeFileService:
+    """Offline replacement for ``genai.upload_file`` / ``genai.get_file`` backed by a local folder."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.uploads = 0
+
+    def upload_file(self, path, display_name: Optional[str] = None, mime_type: Optional[str] = None) -> FakeFile:
+        self.uploads += 1
+        file_id = uuid.uuid4().hex[:12]
+        target = self.root / file_id
+        shutil.copyfile(path, target)
+        (self.root / f"{file_id}.name").write_text(display_name or file_id, encoding="utf-8")
+        return self.get_file(f"files/{file_id}")
+
+    def get_file(self, name: str) -> FakeFile:
+        file_id = name.rsplit("/", 1)[-1]
+        target = self.root / file_id
+        if not target.exists():
+            raise FileNotFoundError(f"Unknown file {name}")
+        display_name = (self.root / f"{file_id}.name").read_text(encoding="utf-8")
+        return FakeFile(f"files/{file_id}", f"files/{file_id}", display_name, target)
+
+
+def load_file_service(model_name: str):
+    """Object exposing ``upload_file`` and ``get_file``: the genai module or the offline fake."""
+    if model_name == FAKE_MODEL_NAME:
+        default_root = Path(tempfile.gettempdir()) / "gemini-fake-files"
+        return FakeFileService(Path(os.getenv("FAKE_FILES_DIR", default_root)))
+
+    import google.generativeai as genai
+
+    return genai
+
+
+def load_model(model_name: str):
+    """Return the generation model for ``model_name``, configuring Gemini if needed."""
+    if model_name == FAKE_MODEL_NAME:
+        return FakeModel(
+            latency=float(os.getenv("FAKE_MODEL_LATENCY", "0")),
+            token_delay=float(os.getenv("FAKE_MODEL_TOKEN_DELAY", "0")),
+        )
+
+    import google.generativeai as genai
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError(
+            "GEMINI_API_KEY is missing. Create a .env file from .env.example or export the variable."
+        )
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
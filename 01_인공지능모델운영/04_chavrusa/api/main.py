@@ -1,25 +1,74 @@
+import asyncio
+import logging
 import os
 import tempfile
+from pathlib import Path
 from typing import Optional
 
-import google.generativeai as genai
 from dotenv import find_dotenv, load_dotenv
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, HTTPException, Request, UploadFile
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-# Load .env even when running from api/ folder
+from cache import ResponseCache, SingleFlight, cache_key
+from limits import GenerationLimiter, run_upstream
+from llm import load_file_service, load_model
+from metrics import CallMetrics, generate
+from retrieval import ChunkIndex, build_prompt, estimate_tokens, load_embedder
+from sessions import Session, SessionStore, build_session_prompt, summary_prompt
+from streaming import event_stream, replay, stream_generation
+from uploads import IndexedFile, SpooledUpload, UploadIndex, spool_upload
+
+# Load .env even when running from api/ folder (first, so it can set LOG_LEVEL)
 load_dotenv(find_dotenv())
 
-# Configure Gemini client once at startup
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise RuntimeError(
-        "GEMINI_API_KEY is missing. Create a .env file from .env.example or export the variable."
-    )
+logger = logging.getLogger("chavrusa.api")
+# Per-call records go to the "chavrusa.calls" logger as JSON lines.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(levelname)s %(message)s")
 
-genai.configure(api_key=API_KEY)
+# Configure Gemini client once at startup (GEMINI_MODEL=fake runs offline without a key)
 MODEL_NAME = os.getenv("GEMINI_MODEL", "models/gemini-1.5-flash")
-model = genai.GenerativeModel(MODEL_NAME)
+model = load_model(MODEL_NAME)
+files = load_file_service(MODEL_NAME)
+call_metrics = CallMetrics(MODEL_NAME)
+
+# Identical /chat requests within the TTL are answered without calling Gemini.
+response_cache = ResponseCache(
+    ttl_seconds=float(os.getenv("CHAT_CACHE_TTL", "600")),
+    max_entries=int(os.getenv("CHAT_CACHE_SIZE", "1024")),
+    path=Path(os.environ["CHAT_CACHE_PATH"]) if os.getenv("CHAT_CACHE_PATH") else None,
+)
+inflight = SingleFlight()
+
+# Caps concurrent upstream calls; excess requests queue (up to GEMINI_MAX_QUEUE) instead of pinning threads.
+limiter = GenerationLimiter(
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "64")),
+)
+REQUEST_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+
+# Uploads are spooled in UPLOAD_DIR and deduplicated by sha256 against UPLOAD_INDEX_PATH.
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", tempfile.gettempdir()))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+upload_index = UploadIndex(Path(os.getenv("UPLOAD_INDEX_PATH", ".cache/uploads.db")))
+upload_flight = SingleFlight()
+
+# Text uploads are chunked into a local BM25 index; /rag then sends only the top RAG_TOP_K passages.
+chunk_index = ChunkIndex(
+    Path(os.getenv("RAG_INDEX_PATH", ".cache/chunks.db")),
+    embedder=load_embedder(os.getenv("RAG_EMBEDDER")),
+)
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+# Larger uploads still go to Gemini but are not chunked locally (chunking holds the chunks in memory).
+RAG_INDEX_MAX_BYTES = int(os.getenv("RAG_INDEX_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Multi-turn sessions: history beyond the token budget is summarized, the last turns stay verbatim.
+sessions = SessionStore(
+    Path(os.getenv("CHAT_SESSION_PATH", ".cache/sessions.db")),
+    token_budget=int(os.getenv("CHAT_SESSION_TOKEN_BUDGET", "2000")),
+    keep_recent=int(os.getenv("CHAT_SESSION_KEEP_TURNS", "4")),
+)
+compacting = set()
 
 app = FastAPI(title="Gemini FastAPI Starter", version="0.1.0")
 
@@ -28,7 +77,9 @@ app = FastAPI(title="Gemini FastAPI Starter", version="0.1.0")
 def root() -> dict:
     return {
         "message": "Gemini FastAPI Starter running. See /docs for interactive docs.",
-        "endpoints": ["/health", "/chat", "/files", "/rag"],
+        "endpoints": [
+            "/health", "/stats", "/chat", "/chat/stream", "/sessions", "/files", "/rag", "/rag/stream"
+        ],
     }
 
 
@@ -37,6 +88,10 @@ class ChatRequest(BaseModel):
     context: Optional[str] = None
 
 
+class SessionChatRequest(BaseModel):
+    query: str
+
+
 class RAGQuery(BaseModel):
     prompt: str
     file_uri: str
@@ -47,42 +102,307 @@ def health_check() -> dict:
     return {"status": "ok", "model": MODEL_NAME}
 
 
+@app.get("/stats")
+def stats() -> dict:
+    return {
+        "cache": response_cache.stats(),
+        "singleflight_shared": inflight.shared,
+        "upstream": limiter.stats(),
+        "uploads": {**upload_index.stats(), "singleflight_shared": upload_flight.shared},
+        "rag_index": chunk_index.stats(),
+        "sessions": sessions.stats(),
+        "calls": call_metrics.stats(),
+    }
+
+
 @app.post("/chat")
-def chat(req: ChatRequest) -> dict:
+async def chat(req: ChatRequest, request: Request) -> dict:
     """Simple text generation endpoint."""
-    prompt = req.query if not req.context else f"{req.query}\n\nContext:\n{req.context}"
-    try:
-        response = model.generate_content(prompt)
-    except Exception as exc:  # pragma: no cover - surface API errors clearly
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    key = cache_key(MODEL_NAME, req.query, req.context)
+    cached = response_cache.get(key)
+    if cached is not None:
+        call_metrics.cached("/chat", "hit")
+        return {"response": cached, "cache": "hit"}
+
+    async def generate_once() -> str:
+        response = await generate(
+            model, _chat_prompt(req), limiter=limiter, metrics=call_metrics, endpoint="/chat"
+        )
+        response_cache.set(key, response.text)
+        return response.text
 
-    return {"response": response.text}
+    # Concurrent identical prompts wait for the first one's generation.
+    text, shared = await run_upstream(request, inflight.do(key, generate_once), timeout=REQUEST_TIMEOUT)
+    if shared:
+        call_metrics.cached("/chat", "shared")
+    return {"response": text, "cache": "shared" if shared else "miss"}
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """Same as ``/chat`` but streams chunks as server-sent events while Gemini generates them."""
+    key = cache_key(MODEL_NAME, req.query, req.context)
+    cached = response_cache.get(key)
+    if cached is not None:
+        call_metrics.cached("/chat/stream", "hit")
+        return event_stream(replay(cached))
+    return event_stream(
+        stream_generation(
+            model,
+            _chat_prompt(req),
+            limiter=limiter,
+            timeout=REQUEST_TIMEOUT,
+            metrics=call_metrics,
+            endpoint="/chat/stream",
+            on_complete=lambda text: response_cache.set(key, text),
+        )
+    )
+
+
+def _chat_prompt(req: ChatRequest) -> str:
+    return req.query if not req.context else f"{req.query}\n\nContext:\n{req.context}"
+
+
+@app.post("/sessions")
+def create_session() -> dict:
+    """Starts a conversation; send its turns to ``/sessions/{session_id}/chat``."""
+    session = sessions.create()
+    return {"session_id": session.id, "token_budget": sessions.token_budget}
+
+
+@app.get("/sessions/{session_id}")
+def get_session(session_id: str) -> dict:
+    session = _session_or_404(session_id)
+    return {
+        "session_id": session.id,
+        "summary": session.summary,
+        "turns": [{"query": turn.query, "response": turn.response} for turn in session.turns],
+        "history_tokens": session.history_tokens,
+    }
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str) -> dict:
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return {"deleted": session_id}
+
+
+@app.post("/sessions/{session_id}/chat")
+async def session_chat(
+    session_id: str, req: SessionChatRequest, request: Request, background_tasks: BackgroundTasks
+) -> dict:
+    """One conversation turn; the prompt holds the session summary and recent turns, never the full history."""
+    session = _session_or_404(session_id)
+    prompt = build_session_prompt(session, req.query, sessions.token_budget)
+
+    work = generate(
+        model, prompt, limiter=limiter, metrics=call_metrics, endpoint="/sessions/chat", cache="none"
+    )
+    text = (await run_upstream(request, work, timeout=REQUEST_TIMEOUT)).text
+    sessions.append(session_id, req.query, text)
+    background_tasks.add_task(_compact_session, session_id)
+    return {"response": text, "session_id": session_id, **_turn_tokens(session, prompt)}
+
+
+@app.post("/sessions/{session_id}/chat/stream")
+async def session_chat_stream(session_id: str, req: SessionChatRequest):
+    """Streaming variant of ``/sessions/{session_id}/chat``; token counts arrive with the ``done`` event."""
+    session = _session_or_404(session_id)
+    prompt = build_session_prompt(session, req.query, sessions.token_budget)
+    return event_stream(
+        stream_generation(
+            model,
+            prompt,
+            limiter=limiter,
+            timeout=REQUEST_TIMEOUT,
+            metrics=call_metrics,
+            endpoint="/sessions/chat/stream",
+            cache="none",
+            on_complete=lambda text: sessions.append(session_id, req.query, text),
+            done={"session_id": session_id, **_turn_tokens(session, prompt)},
+        ),
+        background=BackgroundTask(_compact_session, session_id),
+    )
+
+
+def _session_or_404(session_id: str) -> Session:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return session
+
+
+def _turn_tokens(session: Session, prompt: str) -> dict:
+    return {"prompt_tokens": estimate_tokens(prompt), "history_tokens": session.history_tokens}
+
+
+async def _compact_session(session_id: str) -> None:
+    """Fold all but the most recent turns that fit into the summary once the history exceeds the budget.
+
+    Runs after the response has been sent, so the turn that crosses the
+    budget does not wait for the summary.
+    """
+    if session_id in compacting:
+        return
+    session = sessions.get(session_id)
+    if session is None or not sessions.needs_compaction(session):
+        return
+    compacting.add(session_id)
+    older = sessions.turns_to_fold(session)
+    summary_tokens = sessions.summary_tokens
+    try:
+        response = await asyncio.wait_for(
+            generate(
+                model,
+                summary_prompt(session, older, summary_tokens),
+                limiter=limiter,
+                metrics=call_metrics,
+                endpoint="/sessions/compact",
+                cache="none",
+            ),
+            REQUEST_TIMEOUT,
+        )
+        # Clip in case the model ignores the length instruction, so the summary cannot outgrow the budget.
+        sessions.compact(session_id, response.text.strip()[: summary_tokens * 4], older[-1].id)
+    except Exception:
+        logger.exception("Compacting session %s failed; retrying after its next turn", session_id)
+    finally:
+        compacting.discard(session_id)
 
 
 @app.post("/files")
 async def upload_to_file_search(file: UploadFile = File(...)) -> dict:
-    """Uploads a file to Gemini's File Search API and returns its URI."""
+    """Uploads a file to Gemini's File Search API and returns its URI; identical content is uploaded once."""
+    spooled = await spool_upload(file, UPLOAD_DIR, max_bytes=UPLOAD_MAX_BYTES)
+    owner = False
+
+    def store_once():
+        nonlocal owner
+        owner = True  # the shared upload reads (and deletes) this caller's spooled copy
+        return _store_upload(spooled, file.filename, file.content_type)
+
     try:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-        uploaded_file = genai.upload_file(path=tmp_path, display_name=file.filename)
+        # Concurrent uploads of the same bytes wait for the first one instead of uploading again.
+        (entry, deduplicated), shared = await upload_flight.do(spooled.sha256, store_once)
+    except HTTPException:
+        raise
     except Exception as exc:  # pragma: no cover - surface API errors clearly
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    finally:
+        if not owner:
+            spooled.path.unlink(missing_ok=True)
+    return _file_response(entry, deduplicated=deduplicated or shared)
+
+
+async def _store_upload(spooled: SpooledUpload, filename: Optional[str], content_type: Optional[str]):
+    """``(entry, deduplicated)`` for the spooled bytes, uploading them only if the index has no live copy."""
+    try:
+        existing = upload_index.lookup(spooled.sha256)
+        if existing is not None:
+            if chunk_index.document_for(existing.file_uri) is None:
+                # Uploaded before the chunk index existed (or the index was reset).
+                await asyncio.to_thread(_index_text, spooled.path, existing)
+            return existing, True
+        uploaded_file = await asyncio.to_thread(
+            files.upload_file, path=spooled.path, display_name=filename, mime_type=content_type
+        )
+        entry = IndexedFile(spooled.sha256, uploaded_file.uri, uploaded_file.display_name, spooled.size)
+        await asyncio.to_thread(_index_text, spooled.path, entry)
+        upload_index.record(entry)
+        return entry, False
+    finally:
+        spooled.path.unlink(missing_ok=True)
+
 
-    return {"file_uri": uploaded_file.uri, "display_name": uploaded_file.display_name}
+@app.get("/files/{sha256}")
+def find_uploaded_file(sha256: str) -> dict:
+    """Lets clients skip the upload when the server already has a file with this content hash."""
+    existing = upload_index.lookup(sha256.lower())
+    if existing is None:
+        raise HTTPException(status_code=404, detail="No uploaded file with this sha256")
+    return _file_response(existing, deduplicated=True)
+
+
+def _index_text(path: Path, entry: IndexedFile) -> None:
+    if entry.size > RAG_INDEX_MAX_BYTES:
+        logger.info("Not indexing %s locally: %d bytes exceeds RAG_INDEX_MAX_BYTES", entry.sha256, entry.size)
+        return
+    try:
+        chunk_index.add_file(entry.sha256, path, file_uri=entry.file_uri, display_name=entry.display_name)
+    except UnicodeDecodeError:
+        return  # binary formats (e.g. PDF) are sent to Gemini as whole files
+
+
+def _file_response(entry: IndexedFile, *, deduplicated: bool) -> dict:
+    return {
+        "file_uri": entry.file_uri,
+        "display_name": entry.display_name,
+        "sha256": entry.sha256,
+        "size": entry.size,
+        "deduplicated": deduplicated,
+    }
+
+
+def _file_name(file_uri: str) -> str:
+    """``get_file`` wants ``files/<id>``; accept that or the full URI returned by ``/files``."""
+    return f"files/{file_uri.rstrip('/').rsplit('/', 1)[-1]}"
+
+
+async def _rag_contents(req: RAGQuery):
+    """Top passages of an indexed document, or the whole file for documents that are not indexed."""
+    document = chunk_index.document_for(req.file_uri)
+    if document is not None:
+        passages = await asyncio.to_thread(
+            chunk_index.search, req.prompt, sha256=document["sha256"], top_k=RAG_TOP_K
+        )
+        if passages:
+            prompt = build_prompt(req.prompt, passages)
+            return prompt, {
+                "mode": "passages",
+                "passages": [{"chunk": passage.ordinal, "score": passage.score} for passage in passages],
+                "prompt_tokens_estimate": estimate_tokens(prompt),
+                "document_tokens_estimate": document["tokens"],
+            }
+    file_handle = await asyncio.to_thread(files.get_file, _file_name(req.file_uri))
+    return [file_handle, req.prompt], {"mode": "file"}
 
 
 @app.post("/rag")
-def rag(req: RAGQuery) -> dict:
+async def rag(req: RAGQuery, request: Request) -> dict:
     """Retrieval-augmented generation that grounds responses on a previously uploaded file."""
+    retrieval = {}
+
+    async def answer() -> str:
+        contents, info = await _rag_contents(req)
+        retrieval.update(info)
+        response = await generate(
+            model, contents, limiter=limiter, metrics=call_metrics, endpoint="/rag", cache="none"
+        )
+        return response.text
+
+    text = await run_upstream(request, answer(), timeout=REQUEST_TIMEOUT)
+    return {"response": text, "retrieval": retrieval}
+
+
+@app.post("/rag/stream")
+async def rag_stream(req: RAGQuery):
+    """Streaming variant of ``/rag`` (server-sent events)."""
     try:
-        file_handle = genai.get_file(req.file_uri)
-        response = model.generate_content([file_handle, req.prompt])
+        contents, _ = await _rag_contents(req)
     except Exception as exc:  # pragma: no cover - surface API errors clearly
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-
-    return {"response": response.text}
+    return event_stream(
+        stream_generation(
+            model,
+            contents,
+            limiter=limiter,
+            timeout=REQUEST_TIMEOUT,
+            metrics=call_metrics,
+            endpoint="/rag/stream",
+            cache="none",
+        )
+    )
 
 
 if __name__ == "__main__":
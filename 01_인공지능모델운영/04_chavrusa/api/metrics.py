@@ -0,0 +1,211 @@
+"""Per-call accounting for Gemini generation requests.
+
+Every generation records queue wait, upstream latency, time to first token
+(streaming only), prompt/completion tokens and cache status. Records feed
+fixed-bucket histograms per endpoint (``GET /stats``) and are logged as one
+JSON line each on the ``chavrusa.calls`` logger.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Sequence
+
+from limits import GenerationLimiter, QueueFull
+from retrieval import estimate_tokens
+
+logger = logging.getLogger("chavrusa.calls")
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated linearly inside their bucket.
+
+    The interpolation range is narrowed to the observed min/max, so a quantile
+    never falls outside the values actually seen.
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = max(self.bounds[index - 1], self.min) if index else self.min
+                upper = min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+                return round(lower + (upper - lower) * (rank - seen) / count, 3)
+            seen += count
+        return self.max
+
+    def snapshot(self) -> Dict[str, object]:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "min": self.min,
+            "max": self.max,
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+@dataclass
+class CallRecord:
+    endpoint: str
+    model: str
+    cache: str = "miss"  # miss | hit | shared | none (uncacheable)
+    status: str = "ok"  # ok | queue_full | cancelled | error
+    queue_wait_ms: Optional[float] = None
+    upstream_ms: Optional[float] = None
+    ttft_ms: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    # True when token counts are estimated locally instead of read from usage_metadata.
+    tokens_estimated: bool = False
+
+
+class CallTimer:
+    """Stopwatch for one generation call; hand it to ``CallMetrics.finish`` when done."""
+
+    def __init__(self, record: CallRecord) -> None:
+        self.record = record
+        self._started = time.perf_counter()
+        self._acquired: Optional[float] = None
+
+    def acquired(self) -> None:
+        """The limiter granted a slot: queue wait ends, upstream time starts."""
+        self._acquired = time.perf_counter()
+        self.record.queue_wait_ms = _ms(self._acquired - self._started)
+
+    def first_token(self) -> None:
+        if self.record.ttft_ms is None and self._acquired is not None:
+            self.record.ttft_ms = _ms(time.perf_counter() - self._acquired)
+
+    def response(self, contents, response=None, text: Optional[str] = None) -> None:
+        """Stop the upstream clock and fill token counts from ``usage_metadata`` (or estimates)."""
+        if self._acquired is not None:
+            self.record.upstream_ms = _ms(time.perf_counter() - self._acquired)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "prompt_token_count", None):
+            self.record.prompt_tokens = usage.prompt_token_count
+            self.record.completion_tokens = getattr(usage, "candidates_token_count", None) or 0
+            return
+        self.record.tokens_estimated = True
+        self.record.prompt_tokens = _estimate_contents(contents)
+        if text is None:
+            text = getattr(response, "text", "")
+        self.record.completion_tokens = estimate_tokens(text) if text else 0
+
+
+class CallMetrics:
+    """Histograms and counters of generation calls, grouped by endpoint."""
+
+    FIELDS = {
+        "queue_wait_ms": LATENCY_BUCKETS_MS,
+        "upstream_ms": LATENCY_BUCKETS_MS,
+        "ttft_ms": LATENCY_BUCKETS_MS,
+        "prompt_tokens": TOKEN_BUCKETS,
+        "completion_tokens": TOKEN_BUCKETS,
+    }
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict[str, object]] = {}
+
+    def start(self, endpoint: str, cache: str = "miss") -> CallTimer:
+        return CallTimer(CallRecord(endpoint, self.model, cache=cache))
+
+    def cached(self, endpoint: str, cache: str) -> None:
+        """Record a request answered without its own upstream call (cache hit or shared flight)."""
+        self.finish(self.start(endpoint, cache=cache))
+
+    def finish(self, timer: CallTimer, status: str = "ok") -> None:
+        record = timer.record
+        record.status = status
+        with self._lock:
+            stats = self._endpoints.get(record.endpoint)
+            if stats is None:
+                stats = self._endpoints[record.endpoint] = {
+                    "calls": 0,
+                    "cache": {},
+                    "status": {},
+                    **{name: Histogram(bounds) for name, bounds in self.FIELDS.items()},
+                }
+            stats["calls"] += 1
+            stats["cache"][record.cache] = stats["cache"].get(record.cache, 0) + 1
+            stats["status"][record.status] = stats["status"].get(record.status, 0) + 1
+            for name in self.FIELDS:
+                value = getattr(record, name)
+                if value is not None:
+                    stats[name].observe(value)
+        logger.info(json.dumps({"event": "generation", **asdict(record)}, ensure_ascii=False))
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {endpoint: _snapshot(stats) for endpoint, stats in self._endpoints.items()}
+
+
+async def generate(
+    model, contents, *, limiter: GenerationLimiter, metrics: CallMetrics, endpoint: str, cache: str = "miss"
+):
+    """Non-streaming generation under a limiter slot, recorded in ``metrics``; returns the response."""
+    timer = metrics.start(endpoint, cache=cache)
+    status = "error"
+    try:
+        async with limiter.slot():
+            timer.acquired()
+            response = await model.generate_content_async(contents)
+        timer.response(contents, response)
+        status = "ok"
+        return response
+    except QueueFull:
+        status = "queue_full"
+        raise
+    except asyncio.CancelledError:
+        # run_upstream cancels on deadline or client disconnect.
+        status = "cancelled"
+        raise
+    finally:
+        metrics.finish(timer, status)
+
+
+def _snapshot(stats: Dict[str, object]) -> Dict[str, object]:
+    return {
+        key: value.snapshot() if isinstance(value, Histogram) else dict(value) if isinstance(value, dict) else value
+        for key, value in stats.items()
+    }
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _estimate_contents(contents) -> int:
+    # File handles (non-text parts) are not counted; Gemini reports their real size in usage_metadata.
+    parts = [contents] if isinstance(contents, str) else contents
+    return sum(estimate_tokens(part) for part in parts if isinstance(part, str))
@@ -0,0 +1,300 @@
+"""Local chunk index so /rag sends only the passages relevant to a question.
+
+Uploaded text documents are split into overlapping chunks and indexed in a
+sqlite file with BM25 postings. Documents are added incrementally (keyed by
+content hash), so the index survives restarts and never has to be rebuilt.
+An optional embedder adds dense vectors; its ranking is fused with BM25.
+"""
+
+import importlib
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Files are read a line at a time, but never more than this many characters per read.
+READ_CHARS = 64 * 1024
+
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def split_text(text: str, chunk_chars: int = 1200, overlap: int = 200) -> List[str]:
+    """Split on paragraph and line boundaries into chunks of about ``chunk_chars`` characters."""
+    return list(iter_chunks(text.split("\n"), chunk_chars, overlap))
+
+
+def iter_chunks(lines: Iterable[str], chunk_chars: int = 1200, overlap: int = 200) -> Iterator[str]:
+    """``split_text`` over an iterable of lines, so a file can be chunked while it is read."""
+    current = ""
+    for line in lines:
+        piece = line.strip()
+        if not piece:
+            continue
+        while len(piece) > chunk_chars:
+            # Hard-wrap very long paragraphs.
+            head, piece = piece[:chunk_chars], piece[chunk_chars - overlap :]
+            if current:
+                yield current
+                current = ""
+            yield head
+        if current and len(current) + len(piece) + 1 > chunk_chars:
+            yield current
+            current = current[-overlap:] if overlap else ""
+        current = f"{current}\n{piece}" if current else piece
+    if current:
+        yield current
+
+
+def load_embedder(spec: Optional[str]) -> Optional[Embedder]:
+    """Import ``module:function`` mapping a list of texts to an (n, d) array, if configured."""
+    if not spec:
+        return None
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+@dataclass(frozen=True)
+class Passage:
+    chunk_id: int
+    ordinal: int
+    text: str
+    score: float
+
+
+class ChunkIndex:
+    """BM25 (+ optional vector) index over document chunks, stored in sqlite."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        embedder: Optional[Embedder] = None,
+        chunk_chars: int = 1200,
+        overlap: int = 200,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS documents (
+                sha256 TEXT PRIMARY KEY,
+                file_uri TEXT,
+                display_name TEXT,
+                chunks INTEGER,
+                tokens INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS ix_documents_file_uri ON documents (file_uri);
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                vector BLOB
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunks_sha256 ON chunks (sha256);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_postings_term ON postings (term, chunk_id, tf);
+            """
+        )
+
+    def add_document(self, sha256: str, text: str, *, file_uri: str, display_name: str) -> int:
+        """Index ``text`` under ``sha256`` unless it already is; returns the number of chunks."""
+        return self._add(
+            sha256,
+            lambda: (split_text(text, self.chunk_chars, self.overlap), estimate_tokens(text)),
+            file_uri=file_uri,
+            display_name=display_name,
+        )
+
+    def add_file(self, sha256: str, path: Path, *, file_uri: str, display_name: str) -> int:
+        """``add_document`` for a UTF-8 file, chunked while it is read in bounded pieces.
+
+        Raises ``UnicodeDecodeError`` (before anything is written) if the file is not text.
+        """
+
+        def chunk() -> Tuple[List[str], int]:
+            chars = 0
+
+            def lines(handle) -> Iterator[str]:
+                nonlocal chars
+                while line := handle.readline(READ_CHARS):
+                    chars += len(line)
+                    yield line
+
+            with path.open(encoding="utf-8") as handle:
+                chunks = list(iter_chunks(lines(handle), self.chunk_chars, self.overlap))
+            return chunks, max(1, chars // 4)
+
+        return self._add(sha256, chunk, file_uri=file_uri, display_name=display_name)
+
+    def _add(
+        self, sha256: str, chunk: Callable[[], Tuple[List[str], int]], *, file_uri: str, display_name: str
+    ) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT chunks FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None:
+                # Same content uploaded again (possibly as a new Gemini file): just point at it.
+                self._db.execute("UPDATE documents SET file_uri = ? WHERE sha256 = ?", (file_uri, sha256))
+                self._db.commit()
+                return row[0]
+        chunks, tokens = chunk()
+        vectors = self._embed(chunks) if self.embedder and chunks else None
+        with self._lock, self._db:
+            # Chunking ran outside the lock, so a concurrent upload of the same text may have won.
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO documents (sha256, file_uri, display_name, chunks, tokens) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, file_uri, display_name, len(chunks), tokens),
+            ).rowcount
+            if not inserted:
+                self._db.execute("UPDATE documents SET file_uri = ? WHERE sha256 = ?", (file_uri, sha256))
+                (existing,) = self._db.execute("SELECT chunks FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+                return existing
+            for ordinal, chunk in enumerate(chunks):
+                terms = Counter(tokenize(chunk))
+                vector = vectors[ordinal].astype(np.float32).tobytes() if vectors is not None else None
+                cursor = self._db.execute(
+                    "INSERT INTO chunks (sha256, ordinal, text, length, vector) VALUES (?, ?, ?, ?, ?)",
+                    (sha256, ordinal, chunk, sum(terms.values()), vector),
+                )
+                self._db.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+                )
+        return len(chunks)
+
+    def document_for(self, file_uri: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, display_name, chunks, tokens FROM documents WHERE file_uri = ?", (file_uri,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"sha256": row[0], "display_name": row[1], "chunks": row[2], "tokens": row[3]}
+
+    def search(self, query: str, *, sha256: Optional[str] = None, top_k: int = 4) -> List[Passage]:
+        """Top ``top_k`` chunks for ``query``, optionally restricted to one document, in document order."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            total_chunks, total_length = self._db.execute("SELECT COUNT(*), SUM(length) FROM chunks").fetchone()
+            if not total_chunks:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            document_frequency = dict(
+                self._db.execute(
+                    f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term",
+                    tuple(terms),
+                )
+            )
+            if not document_frequency:
+                return []
+            # BM25 is summed inside sqlite (idf bound as a VALUES table), so postings of
+            # common terms are aggregated there instead of being loaded into Python.
+            idf = [
+                (term, math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))) for term, df in document_frequency.items()
+            ]
+            scope = "WHERE c.sha256 = ?" if sha256 else ""
+            # Vector fusion re-ranks every BM25 match; otherwise only the best top_k are needed.
+            limit = -1 if self.embedder is not None else top_k
+            rows = self._db.execute(
+                f"""
+                WITH query (term, idf) AS (VALUES {",".join(["(?, ?)"] * len(idf))})
+                SELECT p.chunk_id, SUM(query.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score
+                FROM query
+                JOIN postings AS p ON p.term = query.term
+                JOIN chunks AS c ON c.id = p.chunk_id
+                {scope}
+                GROUP BY p.chunk_id
+                ORDER BY score DESC
+                LIMIT ?
+                """,
+                (
+                    *(value for pair in idf for value in pair),
+                    self.k1, self.k1, self.b, self.b, total_length / total_chunks,
+                    *((sha256,) if sha256 else ()),
+                    limit,
+                ),
+            ).fetchall()
+        scores: Dict[int, float] = dict(rows)
+        if self.embedder is not None:
+            scores = self._fuse_with_vectors(query, scores, sha256)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        if not best:
+            return []
+        with self._lock:
+            found = self._db.execute(
+                f"SELECT id, ordinal, text FROM chunks WHERE id IN ({','.join('?' * len(best))})", best
+            ).fetchall()
+        passages = [Passage(chunk_id, ordinal, text, round(scores[chunk_id], 4)) for chunk_id, ordinal, text in found]
+        return sorted(passages, key=lambda passage: passage.ordinal)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents, = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()
+            chunks, = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return {"documents": documents, "chunks": chunks}
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.embedder(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _fuse_with_vectors(self, query: str, scores: Dict[int, float], sha256: Optional[str]) -> Dict[int, float]:
+        """Reciprocal-rank fusion of the BM25 ranking with cosine similarity over stored vectors."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, vector FROM chunks WHERE vector IS NOT NULL" + (" AND sha256 = ?" if sha256 else ""),
+                (sha256,) if sha256 else (),
+            ).fetchall()
+        if not rows:
+            return scores
+        ids = [chunk_id for chunk_id, _ in rows]
+        matrix = np.vstack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+        similarity = matrix @ self._embed([query])[0]
+        vector_rank = {ids[i]: rank for rank, i in enumerate(np.argsort(-similarity))}
+        bm25_rank = {chunk_id: rank for rank, chunk_id in enumerate(sorted(scores, key=scores.get, reverse=True))}
+        fused: Dict[int, float] = {}
+        for chunk_id in set(vector_rank) | set(bm25_rank):
+            fused[chunk_id] = sum(1 / (60 + ranks[chunk_id]) for ranks in (vector_rank, bm25_rank) if chunk_id in ranks)
+        return fused
+
+
+def build_prompt(question: str, passages: Sequence[Passage]) -> str:
+    context = "\n\n".join(f"[{index}] {passage.text}" for index, passage in enumerate(passages, start=1))
+    return (
+        "Answer the question using only the numbered passages from the uploaded document. "
+        "Cite passages like [1].\n\n"
+        f"Passages:\n{context}\n\nQuestion: {question}"
+    )
@@ -0,0 +1,180 @@
+"""Server-side chat sessions with a bounded prompt.
+
+Each session stores its exchanges in sqlite. Prompts are built from a
+running summary plus the most recent exchanges verbatim; once the history
+grows past the token budget, older exchanges are folded into the summary
+so prompt size stays flat however long the conversation runs.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from retrieval import estimate_tokens
+
+
+@dataclass(frozen=True)
+class Turn:
+    id: int
+    query: str
+    response: str
+    tokens: int
+
+
+@dataclass
+class Session:
+    id: str
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+
+    @property
+    def history_tokens(self) -> int:
+        summary = estimate_tokens(self.summary) if self.summary else 0
+        return summary + sum(turn.tokens for turn in self.turns)
+
+
+class SessionStore:
+    """Chat history per session id, persisted in sqlite."""
+
+    def __init__(self, path: Path, *, token_budget: int = 2000, keep_recent: int = 4) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL DEFAULT '',
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS turns (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                query TEXT NOT NULL,
+                response TEXT NOT NULL,
+                tokens INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_turns_session ON turns (session_id, id);
+            """
+        )
+
+    def create(self) -> Session:
+        session = Session(uuid.uuid4().hex)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO sessions (id, created_at, updated_at) VALUES (?, ?, ?)", (session.id, now, now)
+            )
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            turns = self._db.execute(
+                "SELECT id, query, response, tokens FROM turns WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        return Session(session_id, row[0], [Turn(*turn) for turn in turns])
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            return self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def append(self, session_id: str, query: str, response: str) -> None:
+        tokens = estimate_tokens(query) + estimate_tokens(response)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO turns (session_id, query, response, tokens) VALUES (?, ?, ?, ?)",
+                (session_id, query, response, tokens),
+            )
+            self._db.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (time.time(), session_id))
+
+    @property
+    def summary_tokens(self) -> int:
+        """Share of the budget the summary may take; retained turns get the rest."""
+        return self.token_budget // 4
+
+    def needs_compaction(self, session: Session) -> bool:
+        return session.history_tokens > self.token_budget and bool(self.turns_to_fold(session))
+
+    def turns_to_fold(self, session: Session) -> List[Turn]:
+        """Turns the next summary should absorb.
+
+        At most ``keep_recent`` of the newest turns are retained, and fewer when
+        they alone would overflow the budget left after the summary, so one
+        compaction brings the history back within budget. The newest turn is
+        retained even when it alone is over budget (unless ``keep_recent`` is 0),
+        so a lone oversized turn leaves nothing to fold.
+        """
+        room = self.token_budget - self.summary_tokens
+        retained, used = 0, 0
+        for turn in reversed(session.turns):
+            if retained == self.keep_recent or (retained and used + turn.tokens > room):
+                break
+            retained += 1
+            used += turn.tokens
+        return session.turns[: len(session.turns) - retained]
+
+    def compact(self, session_id: str, summary: str, through_turn: int) -> None:
+        """Replace the summary and drop the exchanges it now covers (ids up to ``through_turn``)."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("UPDATE sessions SET summary = ? WHERE id = ?", (summary, session_id))
+            self._db.execute("DELETE FROM turns WHERE session_id = ? AND id <= ?", (session_id, through_turn))
+            self._db.execute("COMMIT")
+            self.compactions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions, = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            turns, = self._db.execute("SELECT COUNT(*) FROM turns").fetchone()
+        return {
+            "sessions": sessions,
+            "stored_turns": turns,
+            "compactions": self.compactions,
+            "token_budget": self.token_budget,
+            "keep_recent": self.keep_recent,
+        }
+
+
+def _transcript(turns: List[Turn]) -> str:
+    return "\n".join(f"User: {turn.query}\nAssistant: {turn.response}" for turn in turns)
+
+
+def build_session_prompt(session: Session, query: str, token_budget: int) -> str:
+    """Summary, then as many recent exchanges as fit in ``token_budget``, then the new question."""
+    recent: List[Turn] = []
+    used = estimate_tokens(session.summary) if session.summary else 0
+    for turn in reversed(session.turns):
+        # Compaction normally keeps history within budget; this guards the turns before it catches up.
+        if recent and used + turn.tokens > token_budget:
+            break
+        recent.insert(0, turn)
+        used += turn.tokens
+    sections = []
+    if session.summary:
+        sections.append(f"Summary of the earlier conversation:\n{session.summary}")
+    if recent:
+        sections.append(f"Recent conversation:\n{_transcript(recent)}")
+    sections.append(f"User: {query}\nAssistant:")
+    return "\n\n".join(sections)
+
+
+def summary_prompt(session: Session, turns: List[Turn], max_tokens: int) -> str:
+    previous = f"Existing summary:\n{session.summary}\n\n" if session.summary else ""
+    return (
+        f"Summarize this conversation in at most {max_tokens * 3 // 4} words. Keep facts, names, decisions "
+        f"and open questions the assistant needs to continue it.\n\n{previous}"
+        f"New exchanges:\n{_transcript(turns)}"
+    )
@@ -0,0 +1,97 @@
+"""Server-sent event streaming of Gemini output."""
+
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from limits import GenerationLimiter, QueueFull
+from metrics import CallMetrics
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_generation(
+    model,
+    contents,
+    *,
+    limiter: GenerationLimiter,
+    timeout: float,
+    metrics: CallMetrics,
+    endpoint: str,
+    cache: str = "miss",
+    on_complete: Optional[Callable[[str], None]] = None,
+    done: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """Yield one ``data`` event per generated chunk, then ``done`` (or ``error``).
+
+    ``done`` adds fields to the final event, e.g. prompt token counts.
+    Starlette cancels this generator when the client disconnects, which also
+    releases the limiter slot and abandons the upstream stream.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    parts = []
+    timer = metrics.start(endpoint, cache=cache)
+    status = "cancelled"
+    try:
+        async with limiter.slot():
+            timer.acquired()
+            response = await asyncio.wait_for(
+                model.generate_content_async(contents, stream=True), deadline - loop.time()
+            )
+            chunks = response.__aiter__()
+            last = None
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                last = chunk
+                if chunk.text:
+                    timer.first_token()
+                    parts.append(chunk.text)
+                    yield sse_event({"text": chunk.text})
+        # Gemini attaches usage_metadata to the final chunk of a stream.
+        timer.response(contents, last, text="".join(parts))
+    except QueueFull as exc:
+        status = "queue_full"
+        yield sse_event({"status": 503, "detail": str(exc)}, event="error")
+        return
+    except asyncio.TimeoutError:
+        status = "timeout"
+        yield sse_event({"status": 504, "detail": f"Gemini did not finish within {timeout:g}s"}, event="error")
+        return
+    except Exception as exc:  # pragma: no cover - surface API errors clearly
+        status = "error"
+        yield sse_event({"status": 500, "detail": str(exc)}, event="error")
+        return
+    else:
+        status = "ok"
+    finally:
+        metrics.finish(timer, status)
+    text = "".join(parts)
+    if on_complete is not None:
+        on_complete(text)
+    yield sse_event({"cache": "miss", **(done or {})}, event="done")
+
+
+async def replay(text: str) -> AsyncIterator[str]:
+    """Stream an already known (cached) answer as a single chunk."""
+    yield sse_event({"text": text})
+    yield sse_event({"cache": "hit"}, event="done")
+
+
+def event_stream(events: AsyncIterator[str], background: Optional[BackgroundTask] = None) -> StreamingResponse:
+    # X-Accel-Buffering stops nginx-style proxies from holding back chunks.
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
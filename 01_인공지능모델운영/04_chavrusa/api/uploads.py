@@ -0,0 +1,105 @@
+"""Streaming, content-addressed uploads for the Gemini File API.
+
+Uploads are spooled to disk in fixed-size chunks while being hashed, so
+memory stays bounded by the chunk size. A sqlite index maps each sha256 to
+the Gemini file it was uploaded as; repeat uploads of the same bytes reuse
+that file instead of sending it again.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+# Gemini deletes uploaded files after 48 hours; stop reusing them a little earlier.
+FILE_TTL_SECONDS = 47 * 3600
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+@dataclass(frozen=True)
+class IndexedFile:
+    sha256: str
+    file_uri: str
+    display_name: str
+    size: int
+
+
+async def spool_upload(
+    upload: UploadFile, directory: Optional[Path] = None, *, max_bytes: int, chunk_size: int = CHUNK_SIZE
+) -> SpooledUpload:
+    """Copy ``upload`` to a temp file chunk by chunk, hashing as it goes; caller deletes the file."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, name = tempfile.mkstemp(prefix="upload-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                handle.write(chunk)
+    except BaseException:
+        os.unlink(name)
+        raise
+    return SpooledUpload(Path(name), digest.hexdigest(), size)
+
+
+class UploadIndex:
+    """sha256 -> uploaded Gemini file, persisted in sqlite."""
+
+    def __init__(self, path: Path, ttl_seconds: float = FILE_TTL_SECONDS) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS uploads (
+                sha256 TEXT PRIMARY KEY,
+                file_uri TEXT NOT NULL,
+                display_name TEXT,
+                size INTEGER,
+                uploaded_at REAL
+            )
+            """
+        )
+
+    def lookup(self, sha256: str) -> Optional[IndexedFile]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256, file_uri, display_name, size FROM uploads WHERE sha256 = ? AND uploaded_at > ?",
+                (sha256, time.time() - self.ttl_seconds),
+            ).fetchone()
+            if row is not None:
+                self.hits += 1
+        return IndexedFile(*row) if row else None
+
+    def record(self, entry: IndexedFile) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO uploads (sha256, file_uri, display_name, size, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (entry.sha256, entry.file_uri, entry.display_name, entry.size, time.time()),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM uploads").fetchone()
+        return {"indexed_files": count, "dedup_hits": self.hits}
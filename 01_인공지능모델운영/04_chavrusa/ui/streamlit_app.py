@@ -1,5 +1,8 @@
+import hashlib
+import json
 import os
 from io import BytesIO
+from typing import Iterator, Optional
 
 import requests
 import streamlit as st
@@ -10,36 +13,94 @@ load_dotenv()
 API_BASE = os.getenv("API_BASE", "http://localhost:8000")
 
 
-def post_json(path: str, payload: dict) -> dict:
-    resp = requests.post(f"{API_BASE}{path}", json=payload, timeout=60)
-    resp.raise_for_status()
-    return resp.json()
+def stream_sse(path: str, payload: dict, done: Optional[dict] = None) -> Iterator[str]:
+    """Yield text chunks from a server-sent event endpoint as they arrive; ``done`` receives the final event."""
+    with requests.post(f"{API_BASE}{path}", json=payload, stream=True, timeout=(5, 60)) as resp:
+        resp.raise_for_status()
+        event = "message"
+        for line in resp.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line.split(":", 1)[1])
+                if event == "error":
+                    raise RuntimeError(f"API 오류 ({data.get('status')}): {data.get('detail')}")
+                if event == "message":
+                    yield data.get("text", "")
+                elif event == "done" and done is not None:
+                    done.update(data)
+            elif not line:
+                event = "message"
 
 
 def upload_file(file) -> dict:
-    data = {"file": (file.name, BytesIO(file.getvalue()), file.type)}
-    resp = requests.post(f"{API_BASE}/files", files=data, timeout=60)
+    """Upload once per content hash: reuse this session's result or the server's index before sending bytes."""
+    content = file.getvalue()
+    digest = hashlib.sha256(content).hexdigest()
+    known = st.session_state.setdefault("uploaded_files", {})
+    if digest in known:
+        return known[digest]
+    resp = requests.get(f"{API_BASE}/files/{digest}", timeout=10)
+    if resp.status_code == 404:
+        data = {"file": (file.name, BytesIO(content), file.type)}
+        resp = requests.post(f"{API_BASE}/files", files=data, timeout=60)
     resp.raise_for_status()
-    return resp.json()
+    known[digest] = resp.json()
+    return known[digest]
 
 
 st.set_page_config(page_title="Gemini FastAPI + Streamlit", page_icon="🤖")
 st.title("Gemini FastAPI + Streamlit")
 st.caption("Tiny demo that calls the FastAPI backend and Gemini.")
 
+
+def chat_session() -> str:
+    """Server-side session for this browser tab; the API keeps and compacts the history."""
+    if "session_id" not in st.session_state:
+        resp = requests.post(f"{API_BASE}/sessions", timeout=10)
+        resp.raise_for_status()
+        st.session_state.session_id = resp.json()["session_id"]
+        st.session_state.messages = []
+    return st.session_state.session_id
+
+
 st.subheader("1) 일반 챗")
-with st.form("chat"):
+session_id = chat_session()
+for message in st.session_state.messages:
+    with st.chat_message(message["role"]):
+        st.markdown(message["text"])
+        if message.get("caption"):
+            st.caption(message["caption"])
+
+with st.form("chat", clear_on_submit=True):
     query = st.text_area("질문", placeholder="예: Gemini로 FastAPI를 만드는 법을 알려줘", height=100)
-    context = st.text_area("선택: 추가 컨텍스트", height=80)
-    if st.form_submit_button("보내기"):
-        if not query.strip():
-            st.warning("질문을 입력하세요.")
-        else:
-            try:
-                data = post_json("/chat", {"query": query, "context": context or None})
-                st.success(data.get("response", ""))
-            except requests.HTTPError as exc:
-                st.error(f"API 오류: {exc.response.text}")
+    col_send, col_reset = st.columns([1, 1])
+    send = col_send.form_submit_button("보내기")
+    reset = col_reset.form_submit_button("새 대화")
+if reset:
+    requests.delete(f"{API_BASE}/sessions/{session_id}", timeout=10)
+    del st.session_state["session_id"]
+    st.rerun()
+if send:
+    if not query.strip():
+        st.warning("질문을 입력하세요.")
+    else:
+        with st.chat_message("user"):
+            st.markdown(query)
+        done: dict = {}
+        try:
+            with st.chat_message("assistant"):
+                answer = st.write_stream(stream_sse(f"/sessions/{session_id}/chat/stream", {"query": query}, done))
+                caption = f"프롬프트 약 {done.get('prompt_tokens', '?')} 토큰 (대화 기록 {done.get('history_tokens', '?')} 토큰)"
+                st.caption(caption)
+            st.session_state.messages += [
+                {"role": "user", "text": query},
+                {"role": "assistant", "text": answer, "caption": caption},
+            ]
+        except requests.HTTPError as exc:
+            st.error(f"API 오류: {exc.response.text}")
+        except RuntimeError as exc:
+            st.error(str(exc))
 
 st.subheader("2) 파일 기반 RAG (File Search API)")
 uploaded = st.file_uploader("텍스트/문서 파일 업로드", type=["txt", "md", "pdf"])
@@ -52,10 +113,11 @@ if st.button("업로드 & 질의"):
     else:
         try:
             info = upload_file(uploaded)
-            data = post_json(
-                "/rag", {"prompt": rag_question, "file_uri": info["file_uri"]}
-            )
             st.info(f"파일 업로드: {info['display_name']} (uri: {info['file_uri']})")
-            st.success(data.get("response", ""))
+            st.write_stream(
+                stream_sse("/rag/stream", {"prompt": rag_question, "file_uri": info["file_uri"]})
+            )
         except requests.HTTPError as exc:
             st.error(f"API 오류: {exc.response.text}")
+        except RuntimeError as exc:
+            st.error(str(exc))
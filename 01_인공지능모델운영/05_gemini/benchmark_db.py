@@ -0,0 +1,145 @@
+"""Concurrent read throughput: connection-per-request vs the pooled WAL layer.
+
+Seeds a throwaway database, then runs reader threads calling
+``creature_service.get_creature`` for a fixed time, optionally alongside a
+writer thread calling ``update_creature``:
+
+    python benchmark_db.py --rows 20000 --readers 8 --seconds 5
+    python benchmark_db.py --no-writer
+
+"per_request" reproduces the old access pattern (new ``sqlite3.connect`` per
+call, rollback journal, default fsync); "pooled" uses ``data.database``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, List
+
+from data.database import ConnectionPool
+from models.creature import CreatureCreate
+from services import creature_service
+
+SCHEMA = """
+CREATE TABLE creatures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    habitat TEXT,
+    description TEXT
+);
+"""
+
+
+def seed(path: Path, rows: int, journal_mode: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode};")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO creatures (name, habitat, description) VALUES (?, ?, ?);",
+        ((f"creature-{i}", "forest", "benchmark row " * 8) for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_request_connections(path: Path) -> Callable[[], ContextManager[sqlite3.Connection]]:
+    @contextmanager
+    def connection():
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    return connection
+
+
+def run(connection: Callable[[], ContextManager[sqlite3.Connection]], rows: int, args) -> Dict[str, object]:
+    stop = threading.Event()
+    latencies: List[List[float]] = [[] for _ in range(args.readers)]
+    writes = [0]
+    errors = [0]
+
+    def reader(index: int) -> None:
+        rng = random.Random(index)
+        samples = latencies[index]
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with connection() as conn:
+                    creature_service.get_creature(conn, rng.randint(1, rows))
+            except sqlite3.OperationalError:
+                errors[0] += 1
+                continue
+            samples.append(time.perf_counter() - started)
+
+    def writer() -> None:
+        rng = random.Random(-1)
+        while not stop.is_set():
+            creature_id = rng.randint(1, rows)
+            payload = CreatureCreate(name=f"creature-{creature_id - 1}", habitat="swamp", description="updated")
+            try:
+                with connection() as conn:
+                    creature_service.update_creature(conn, creature_id, payload)
+            except sqlite3.OperationalError:
+                errors[0] += 1
+                continue
+            writes[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(index,)) for index in range(args.readers)]
+    if args.writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(value for per_thread in latencies for value in per_thread)
+    return {
+        "reads": len(samples),
+        "reads_per_second": round(len(samples) / args.seconds, 1),
+        "read_p50_ms": round(statistics.median(samples) * 1000, 3) if samples else None,
+        "read_p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3) if samples else None,
+        "writes_per_second": round(writes[0] / args.seconds, 1),
+        "errors": errors[0],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--no-writer", dest="writer", action="store_false", help="Read-only workload")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="db-bench-") as tmp:
+        baseline_path, pooled_path = Path(tmp) / "baseline.db", Path(tmp) / "pooled.db"
+        seed(baseline_path, args.rows, "DELETE")
+        seed(pooled_path, args.rows, "WAL")
+        pool = ConnectionPool(pooled_path, size=args.readers + 1)
+        results = {
+            "config": {"rows": args.rows, "readers": args.readers, "seconds": args.seconds, "writer": args.writer},
+            "per_request": run(per_request_connections(baseline_path), args.rows, args),
+            "pooled": run(pool.connection, args.rows, args),
+        }
+        pool.close()
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
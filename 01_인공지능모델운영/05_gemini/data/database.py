@@ -1,13 +1,97 @@
 """SQLite database setup and connection utilities."""
 from __future__ import annotations
 
+import asyncio
+import os
+import queue
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator, Iterator, Sequence, TypeVar
 
 from .psv_loader import load_initial_data
 
-DB_PATH = Path(__file__).resolve().parent / "app.db"
+T = TypeVar("T")
+
+DB_PATH = Path(os.getenv("APP_DB_PATH", Path(__file__).resolve().parent / "app.db"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+# Applied to every pooled connection. WAL lets readers run alongside a writer;
+# synchronous=NORMAL skips the fsync per commit (WAL stays crash-safe, only the
+# last commits before a power loss can be lost).
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA busy_timeout = 5000;",
+    "PRAGMA cache_size = -20000;",  # KiB, i.e. about 20 MB of page cache per connection
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA mmap_size = 268435456;",
+)
+
+# FTS5 indexes over the text columns, named "<table>_fts". They are external-content
+# tables (the text lives only in the base table) kept in sync by triggers.
+FULL_TEXT_INDEXES = {
+    "creatures": ("name", "habitat", "description"),
+    "explorers": ("name", "specialty"),
+}
+
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    """Open a connection tuned for the pool (WAL, relaxed fsync, larger cache)."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL;")
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections handed out one request at a time."""
+
+    def __init__(self, path: Path = DB_PATH, size: int = DB_POOL_SIZE) -> None:
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()  # never hand out a connection with an open transaction
+            self._idle.put(conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                return connect(self.path)
+        return self._idle.get()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._opened = 0
+
+
+pool = ConnectionPool()
+# Dedicated threads for async routes: DB work neither blocks the event loop nor
+# occupies the shared threadpool, and at most one thread per pooled connection runs.
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="sqlite")
 
 
 def initialize_db() -> None:
@@ -15,6 +99,8 @@ def initialize_db() -> None:
     conn = sqlite3.connect(DB_PATH)
     try:
         cursor = conn.cursor()
+        # journal_mode is stored in the database file, so every later connection uses WAL.
+        cursor.execute("PRAGMA journal_mode = WAL;")
         cursor.execute("PRAGMA foreign_keys = ON;")
 
         cursor.execute(
@@ -39,6 +125,13 @@ def initialize_db() -> None:
             );
             """
         )
+        # Lets SQLite check the foreign key on creature deletes/renames without scanning explorers.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_explorers_favorite_creature ON explorers (favorite_creature);"
+        )
+
+        for table, columns in FULL_TEXT_INDEXES.items():
+            _create_full_text_index(cursor, table, columns)
 
         data_dir = Path(__file__).resolve().parent
         seeds = load_initial_data(data_dir)
@@ -72,11 +165,47 @@ def initialize_db() -> None:
         conn.close()
 
 
+def _create_full_text_index(cursor: sqlite3.Cursor, table: str, columns: Sequence[str]) -> None:
+    fts = f"{table}_fts"
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (fts,)).fetchone()
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    cursor.executescript(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column_list},
+            content = '{table}', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+        END;
+        """
+    )
+    if not exists:
+        # Index rows written before the search index existed.
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild');")
+
+
 def get_db_connection() -> Generator[sqlite3.Connection, None, None]:
-    """FastAPI dependency that yields a SQLite connection and closes it after use."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
+    """FastAPI dependency that lends a pooled SQLite connection for the request."""
+    with pool.connection() as conn:
         yield conn
-    finally:
-        conn.close()
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Async service variant: run ``fn(conn, *args, **kwargs)`` with a pooled connection on the DB executor."""
+
+    def call() -> T:
+        with pool.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(db_executor, call)
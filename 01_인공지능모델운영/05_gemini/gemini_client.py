@@ -1,46 +1,71 @@
 """Thin wrapper around the Gemini API to keep the FastAPI endpoint lean."""
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
-from typing import Optional
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+from metrics import CallMetrics, CallRecord, call_metrics, estimate_tokens
+
+# GEMINI_MODEL=fake answers locally without a key or network access (tests, benchmarks).
+FAKE_MODEL_NAME = "fake"
+
+
+class FakeModel:
+    """Deterministic stand-in for ``genai.GenerativeModel`` that echoes the prompt."""
+
+    model_name = FAKE_MODEL_NAME
+
+    def generate_content(self, prompt: str):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        text = f"[fake:{digest}] {prompt[:200]}"
+        usage = SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt), candidates_token_count=estimate_tokens(text)
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage)
 
 
 class GeminiClient:
+    """Process-wide Gemini client: configured once, reusing model objects across requests.
+
+    ``genai.configure`` sets up the SDK's shared transport, so it runs only on
+    first use. If the configured model is unavailable, the model found by
+    ``genai.list_models()`` is remembered for ``discovery_ttl`` seconds instead
+    of being rediscovered on every request.
+    """
+
     def __init__(
         self,
         api_key: Optional[str] = None,
         model: str = None,
+        metrics: Optional[CallMetrics] = None,
+        discovery_ttl: Optional[float] = None,
     ) -> None:
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         # Default to a generally available text model; allow override via env or init.
         self.model = model or os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
         self._fallback_model = "gemini-1.5-flash"
+        self.metrics = metrics or call_metrics
+        if discovery_ttl is None:
+            discovery_ttl = float(os.getenv("GEMINI_DISCOVERY_TTL", "3600"))
+        self.discovery_ttl = discovery_ttl
+        self._lock = threading.Lock()
+        # Separate lock so a slow list_models() call only holds up other discoveries.
+        self._discovery_lock = threading.Lock()
+        self._genai = None
+        self._models: Dict[str, object] = {}
+        # (model name or None, monotonic expiry) of the last list_models() lookup.
+        self._discovered: Optional[Tuple[Optional[str], float]] = None
+        self.discoveries = 0
 
-    def _pick_supported_model(self, genai) -> Optional[str]:
-        """Return the first available model that supports generateContent."""
-        try:
-            models = list(genai.list_models())
-        except Exception:
-            return None
-
-        candidates = [
-            m.name
-            for m in models
-            if "supported_generation_methods" in m.__dict__
-            and "generateContent" in getattr(m, "supported_generation_methods", [])
-        ]
-        if not candidates:
-            return None
-
-        preferred = [m for m in candidates if "1.5" in m] or candidates
-        return preferred[0]
-
-    def generate(self, prompt: str) -> str:
-        """Send a prompt to Gemini and return the generated text."""
-        if not prompt.strip():
-            return ""
-
+    def _sdk(self):
+        """Import and configure ``google.generativeai`` once per process."""
+        if self._genai is not None:
+            return self._genai
         try:
             import google.generativeai as genai  # type: ignore
         except ImportError as exc:  # pragma: no cover - dependency notice
@@ -50,25 +75,109 @@ class GeminiClient:
 
         if not self.api_key:
             raise RuntimeError("GEMINI_API_KEY environment variable is not set.")
+        with self._lock:
+            if self._genai is None:
+                genai.configure(api_key=self.api_key)
+                self._genai = genai
+        return self._genai
+
+    def _model(self, name: str):
+        """Cached ``GenerativeModel`` (or the offline fake) for ``name``."""
+        model = self._models.get(name)
+        if model is None:
+            model = FakeModel() if name == FAKE_MODEL_NAME else self._sdk().GenerativeModel(name)
+            with self._lock:
+                model = self._models.setdefault(name, model)
+        return model
+
+    def _active_model(self) -> str:
+        """The configured model, or the discovered replacement while that lookup is fresh."""
+        discovered = self._discovered
+        if discovered and discovered[0] and discovered[1] > time.monotonic():
+            return discovered[0]
+        return self.model
+
+    def warm(self) -> None:
+        """Configure the SDK and build the model object up front (called at app startup)."""
+        self._model(self._active_model())
+
+    def _call(self, model, model_name: str, prompt: str):
+        """``model.generate_content(prompt)``, recording latency and token usage."""
+        started = time.perf_counter()
+        try:
+            response = model.generate_content(prompt)
+        except Exception:
+            self.metrics.record(CallRecord(model_name, status="error", upstream_ms=_elapsed_ms(started)))
+            raise
+        record = CallRecord(model_name, upstream_ms=_elapsed_ms(started))
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "prompt_token_count", None):
+            record.prompt_tokens = usage.prompt_token_count
+            record.completion_tokens = getattr(usage, "candidates_token_count", None) or 0
+        else:
+            record.tokens_estimated = True
+            record.prompt_tokens = estimate_tokens(prompt)
+            record.completion_tokens = estimate_tokens(getattr(response, "text", "") or "")
+        self.metrics.record(record)
+        return response
+
+    def _pick_supported_model(self, genai) -> Optional[str]:
+        """Return the first available model that supports generateContent (cached for ``discovery_ttl``)."""
+        with self._discovery_lock:
+            if self._discovered and self._discovered[1] > time.monotonic():
+                return self._discovered[0]
+            self.discoveries += 1
+            try:
+                models = list(genai.list_models())
+            except Exception:
+                return None
 
-        genai.configure(api_key=self.api_key)
+            candidates = [
+                m.name
+                for m in models
+                if "supported_generation_methods" in m.__dict__
+                and "generateContent" in getattr(m, "supported_generation_methods", [])
+            ]
+            preferred = [m for m in candidates if "1.5" in m] or candidates
+            # A negative answer is cached too, so a missing model does not trigger list_models per request.
+            self._discovered = (preferred[0] if preferred else None, time.monotonic() + self.discovery_ttl)
+            return self._discovered[0]
+
+    def generate(self, prompt: str) -> str:
+        """Send a prompt to Gemini and return the generated text."""
+        if not prompt.strip():
+            return ""
+
+        model_name = self._active_model()
         try:
-            response = genai.GenerativeModel(self.model).generate_content(prompt)
+            response = self._call(self._model(model_name), model_name, prompt)
         except Exception as exc:  # pragma: no cover - runtime path
             message = str(exc)
             not_found = "not found for API version" in message or "is not supported for generateContent" in message
             if not_found:
                 # Try auto-discovering a supported model.
-                auto_model = self._pick_supported_model(genai)
-                if auto_model and auto_model != self.model:
-                    logging.warning("Model '%s' unavailable, auto-selecting '%s'.", self.model, auto_model)
-                    response = genai.GenerativeModel(auto_model).generate_content(prompt)
-                    self.model = auto_model
+                auto_model = self._pick_supported_model(self._sdk())
+                if auto_model and auto_model != model_name:
+                    logging.warning("Model '%s' unavailable, auto-selecting '%s'.", model_name, auto_model)
+                    response = self._call(self._model(auto_model), auto_model, prompt)
                 else:
                     raise RuntimeError(
-                        f"Model '{self.model}' is unavailable for generateContent. "
+                        f"Model '{model_name}' is unavailable for generateContent. "
                         "Set GEMINI_MODEL to a supported model such as 'gemini-1.5-flash' or 'gemini-1.5-pro-latest'."
                     ) from exc
             else:
                 raise
         return getattr(response, "text", "") or ""
+
+    def stats(self) -> Dict[str, object]:
+        discovered = self._discovered
+        return {
+            "configured_model": self.model,
+            "active_model": self._active_model(),
+            "discoveries": self.discoveries,
+            "discovery_expires_in": round(discovered[1] - time.monotonic(), 1) if discovered else None,
+        }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
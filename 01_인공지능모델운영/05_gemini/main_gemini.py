@@ -1,16 +1,18 @@
 from __future__ import annotations
 
+import logging
 import os
 from pathlib import Path
 from typing import Callable
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 
-from data.database import initialize_db
+from data.database import initialize_db, pool
 from gemini_client import GeminiClient
+from metrics import call_metrics
 from routers import creature, explorer
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -35,6 +37,8 @@ def _load_env() -> None:
 
 
 _load_env()
+# Gemini calls are logged as JSON lines on the "gemini.calls" logger.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(levelname)s %(message)s")
 
 app = FastAPI(title="Gemini Chat + FastAPI CRUD", version="0.1.0")
 
@@ -51,13 +55,25 @@ class ChatRequest(BaseModel):
     message: str
 
 
-def get_gemini_client() -> GeminiClient:
-    return GeminiClient()
+def get_gemini_client(request: Request) -> GeminiClient:
+    """The client created at startup; shared by every request."""
+    return request.app.state.gemini
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     initialize_db()
+    app.state.gemini = GeminiClient()
+    try:
+        app.state.gemini.warm()
+    except RuntimeError as exc:
+        # Missing key or SDK: CRUD routes still work, /chat reports the error per request.
+        logging.warning("Gemini client not ready: %s", exc)
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    pool.close()
 
 
 @app.get("/")
@@ -77,5 +93,11 @@ def chat(
     return JSONResponse({"reply": reply})
 
 
+@app.get("/stats")
+def stats() -> dict:
+    """Latency and token histograms of Gemini calls since startup."""
+    return {"gemini": call_metrics.stats(), "client": app.state.gemini.stats()}
+
+
 app.include_router(creature.router)
 app.include_router(explorer.router)
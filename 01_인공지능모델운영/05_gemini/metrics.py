@@ -0,0 +1,120 @@
+"""Latency and token accounting for Gemini calls made by ``GeminiClient``."""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger("gemini.calls")
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated linearly inside their bucket.
+
+    The interpolation range is narrowed to the observed min/max, so a quantile
+    never falls outside the values actually seen.
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = max(self.bounds[index - 1], self.min) if index else self.min
+                upper = min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+                return round(lower + (upper - lower) * (rank - seen) / count, 3)
+            seen += count
+        return self.max
+
+    def snapshot(self) -> Dict[str, object]:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "min": self.min,
+            "max": self.max,
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+@dataclass
+class CallRecord:
+    model: str
+    status: str = "ok"  # ok | error
+    cache: str = "none"
+    upstream_ms: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    # True when token counts are estimated locally instead of read from usage_metadata.
+    tokens_estimated: bool = False
+
+
+class CallMetrics:
+    """Process-wide histograms of Gemini calls, exposed on ``GET /stats``."""
+
+    FIELDS = {
+        "upstream_ms": LATENCY_BUCKETS_MS,
+        "prompt_tokens": TOKEN_BUCKETS,
+        "completion_tokens": TOKEN_BUCKETS,
+    }
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.status: Dict[str, int] = {}
+        self.models: Dict[str, int] = {}
+        self.histograms = {name: Histogram(bounds) for name, bounds in self.FIELDS.items()}
+
+    def record(self, record: CallRecord) -> None:
+        with self._lock:
+            self.calls += 1
+            self.status[record.status] = self.status.get(record.status, 0) + 1
+            self.models[record.model] = self.models.get(record.model, 0) + 1
+            for name, histogram in self.histograms.items():
+                value = getattr(record, name)
+                if value is not None:
+                    histogram.observe(value)
+        logger.info(json.dumps({"event": "generation", **asdict(record)}, ensure_ascii=False))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "status": dict(self.status),
+                "models": dict(self.models),
+                **{name: histogram.snapshot() for name, histogram in self.histograms.items()},
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+call_metrics = CallMetrics()
@@ -0,0 +1,35 @@
+"""HTTP helpers for the bulk create/update/delete endpoints."""
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, Dict, List, Literal, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+from data.database import run_db
+from services import bulk
+
+OnConflict = Literal["skip", "update", "fail"]
+APPLIED = {"created", "updated", "deleted"}
+
+
+async def bulk_response(
+    fn: Callable[..., List[Dict[str, object]]], items: Sequence[object], *args, all_or_nothing: bool = False
+) -> JSONResponse:
+    """Run ``fn(conn, items, *args)`` in one transaction and return per-item results plus counts.
+
+    Answers 409 when an all-or-nothing batch was rejected or SQLite still refused it.
+    """
+    if len(items) > bulk.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {bulk.MAX_BATCH_SIZE} items per batch",
+        )
+    try:
+        results = await run_db(fn, items, *args)
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    body = bulk.summarize(results)
+    rejected = all_or_nothing and any(item["status"] not in APPLIED for item in results)
+    return JSONResponse(body, status_code=status.HTTP_409_CONFLICT if rejected else status.HTTP_200_OK)
@@ -1,51 +1,119 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from data.database import get_db_connection
+from data.database import run_db
 from models.creature import CreatureCreate, CreatureGet
-from services import creature_service
+from routers.bulk import OnConflict, bulk_response
+from routers.pagination import PAGE_HEADERS, columns_or_400, ndjson_response, page_response
+from services import creature_service, listing, search
 
 router = APIRouter(prefix="/creatures", tags=["creatures"])
 
 
-@router.get("/", response_model=List[CreatureGet])
-def list_creatures(conn=Depends(get_db_connection)) -> List[CreatureGet]:
-    return creature_service.list_creatures(conn)
+@router.get(
+    "/",
+    response_class=JSONResponse,
+    responses={200: {"description": "Page of creatures with the requested fields", "headers": PAGE_HEADERS}},
+)
+async def list_creatures(
+    request: Request,
+    after: int = Query(0, ge=0, description="Return creatures with id greater than this cursor"),
+    limit: int = Query(listing.DEFAULT_PAGE_SIZE, ge=1, le=listing.MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return; id is always included"),
+) -> JSONResponse:
+    """Creatures by ascending id, projected to ``fields``; the next page is linked in the headers."""
+    columns = columns_or_400(fields, creature_service.COLUMNS)
+    rows, next_cursor = await run_db(creature_service.list_creatures, after_id=after, limit=limit, columns=columns)
+    return page_response(request, rows, next_cursor)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_creatures(fields: Optional[str] = None) -> StreamingResponse:
+    """All creatures as newline-delimited JSON, streamed as rows are read."""
+    columns = columns_or_400(fields, creature_service.COLUMNS)
+    return ndjson_response(creature_service.export_creatures, columns)
+
+
+@router.get("/search", response_class=JSONResponse)
+async def search_creatures(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; each matches as a prefix"),
+    offset: int = Query(0, ge=0, lt=search.MAX_CANDIDATES),
+    limit: int = Query(search.DEFAULT_RESULTS, ge=1, le=search.MAX_RESULTS),
+) -> JSONResponse:
+    """Creatures ranked by full-text relevance, each with ``score`` and a highlighted ``snippet``.
+
+    ``X-Search-Truncated: true`` means only the newest ``MAX_CANDIDATES`` matches were ranked.
+    """
+    try:
+        hits, next_offset, truncated = await run_db(creature_service.search_creatures, q, offset=offset, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    headers = {"X-Search-Truncated": "true"} if truncated else None
+    return page_response(request, hits, next_offset, cursor_param="offset", headers=headers)
+
+
+@router.post("/bulk", response_class=JSONResponse)
+async def bulk_create_creatures(
+    payloads: List[CreatureCreate],
+    on_conflict: OnConflict = Query(
+        "skip", description="Existing name: skip (report a conflict), update (upsert) or fail the whole batch"
+    ),
+) -> JSONResponse:
+    """Create many creatures in one transaction; the response has one result per item, in order."""
+    return await bulk_response(
+        creature_service.bulk_create_creatures, payloads, on_conflict, all_or_nothing=on_conflict == "fail"
+    )
+
+
+@router.put("/bulk", response_class=JSONResponse)
+async def bulk_update_creatures(payloads: List[CreatureGet]) -> JSONResponse:
+    return await bulk_response(creature_service.bulk_update_creatures, payloads)
+
+
+@router.delete("/bulk", response_class=JSONResponse)
+async def bulk_delete_creatures(ids: List[int] = Body(..., description="Creature ids to delete")) -> JSONResponse:
+    return await bulk_response(creature_service.bulk_delete_creatures, ids)
 
 
 @router.get("/{creature_id}", response_model=CreatureGet)
-def read_creature(creature_id: int, conn=Depends(get_db_connection)) -> CreatureGet:
-    creature = creature_service.get_creature(conn, creature_id)
+async def read_creature(creature_id: int) -> CreatureGet:
+    creature = await run_db(creature_service.get_creature, creature_id)
     if creature is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Creature not found")
     return creature
 
 
 @router.post("/", response_model=CreatureGet, status_code=status.HTTP_201_CREATED)
-def create_creature(payload: CreatureCreate, conn=Depends(get_db_connection)) -> CreatureGet:
+async def create_creature(payload: CreatureCreate) -> CreatureGet:
     try:
-        return creature_service.create_creature(conn, payload)
+        return await run_db(creature_service.create_creature, payload)
     except sqlite3.IntegrityError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.put("/{creature_id}", response_model=CreatureGet)
-def update_creature(
-    creature_id: int, payload: CreatureCreate, conn=Depends(get_db_connection)
-) -> CreatureGet:
-    updated = creature_service.update_creature(conn, creature_id, payload)
+async def update_creature(creature_id: int, payload: CreatureCreate) -> CreatureGet:
+    try:
+        updated = await run_db(creature_service.update_creature, creature_id, payload)
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Creature not found")
     return updated
 
 
 @router.delete("/{creature_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_creature(creature_id: int, conn=Depends(get_db_connection)) -> Response:
-    deleted = creature_service.delete_creature(conn, creature_id)
+async def delete_creature(creature_id: int) -> Response:
+    try:
+        deleted = await run_db(creature_service.delete_creature, creature_id)
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Creature not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
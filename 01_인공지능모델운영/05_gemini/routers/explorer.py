@@ -1,51 +1,119 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from data.database import get_db_connection
+from data.database import run_db
 from models.explorer import ExplorerCreate, ExplorerGet
-from services import explorer_service
+from routers.bulk import OnConflict, bulk_response
+from routers.pagination import PAGE_HEADERS, columns_or_400, ndjson_response, page_response
+from services import explorer_service, listing, search
 
 router = APIRouter(prefix="/explorers", tags=["explorers"])
 
 
-@router.get("/", response_model=List[ExplorerGet])
-def list_explorers(conn=Depends(get_db_connection)) -> List[ExplorerGet]:
-    return explorer_service.list_explorers(conn)
+@router.get(
+    "/",
+    response_class=JSONResponse,
+    responses={200: {"description": "Page of explorers with the requested fields", "headers": PAGE_HEADERS}},
+)
+async def list_explorers(
+    request: Request,
+    after: int = Query(0, ge=0, description="Return explorers with id greater than this cursor"),
+    limit: int = Query(listing.DEFAULT_PAGE_SIZE, ge=1, le=listing.MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return; id is always included"),
+) -> JSONResponse:
+    """Explorers by ascending id, projected to ``fields``; the next page is linked in the headers."""
+    columns = columns_or_400(fields, explorer_service.COLUMNS)
+    rows, next_cursor = await run_db(explorer_service.list_explorers, after_id=after, limit=limit, columns=columns)
+    return page_response(request, rows, next_cursor)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_explorers(fields: Optional[str] = None) -> StreamingResponse:
+    """All explorers as newline-delimited JSON, streamed as rows are read."""
+    columns = columns_or_400(fields, explorer_service.COLUMNS)
+    return ndjson_response(explorer_service.export_explorers, columns)
+
+
+@router.get("/search", response_class=JSONResponse)
+async def search_explorers(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; each matches as a prefix"),
+    offset: int = Query(0, ge=0, lt=search.MAX_CANDIDATES),
+    limit: int = Query(search.DEFAULT_RESULTS, ge=1, le=search.MAX_RESULTS),
+) -> JSONResponse:
+    """Explorers ranked by full-text relevance, each with ``score`` and a highlighted ``snippet``.
+
+    ``X-Search-Truncated: true`` means only the newest ``MAX_CANDIDATES`` matches were ranked.
+    """
+    try:
+        hits, next_offset, truncated = await run_db(explorer_service.search_explorers, q, offset=offset, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    headers = {"X-Search-Truncated": "true"} if truncated else None
+    return page_response(request, hits, next_offset, cursor_param="offset", headers=headers)
+
+
+@router.post("/bulk", response_class=JSONResponse)
+async def bulk_create_explorers(
+    payloads: List[ExplorerCreate],
+    on_conflict: OnConflict = Query(
+        "skip", description="Existing name: skip (report a conflict), update (upsert) or fail the whole batch"
+    ),
+) -> JSONResponse:
+    """Create many explorers in one transaction; the response has one result per item, in order."""
+    return await bulk_response(
+        explorer_service.bulk_create_explorers, payloads, on_conflict, all_or_nothing=on_conflict == "fail"
+    )
+
+
+@router.put("/bulk", response_class=JSONResponse)
+async def bulk_update_explorers(payloads: List[ExplorerGet]) -> JSONResponse:
+    return await bulk_response(explorer_service.bulk_update_explorers, payloads)
+
+
+@router.delete("/bulk", response_class=JSONResponse)
+async def bulk_delete_explorers(ids: List[int] = Body(..., description="Explorer ids to delete")) -> JSONResponse:
+    return await bulk_response(explorer_service.bulk_delete_explorers, ids)
 
 
 @router.get("/{explorer_id}", response_model=ExplorerGet)
-def read_explorer(explorer_id: int, conn=Depends(get_db_connection)) -> ExplorerGet:
-    explorer = explorer_service.get_explorer(conn, explorer_id)
+async def read_explorer(explorer_id: int) -> ExplorerGet:
+    explorer = await run_db(explorer_service.get_explorer, explorer_id)
     if explorer is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Explorer not found")
     return explorer
 
 
 @router.post("/", response_model=ExplorerGet, status_code=status.HTTP_201_CREATED)
-def create_explorer(payload: ExplorerCreate, conn=Depends(get_db_connection)) -> ExplorerGet:
+async def create_explorer(payload: ExplorerCreate) -> ExplorerGet:
     try:
-        return explorer_service.create_explorer(conn, payload)
+        return await run_db(explorer_service.create_explorer, payload)
     except sqlite3.IntegrityError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.put("/{explorer_id}", response_model=ExplorerGet)
-def update_explorer(
-    explorer_id: int, payload: ExplorerCreate, conn=Depends(get_db_connection)
-) -> ExplorerGet:
-    updated = explorer_service.update_explorer(conn, explorer_id, payload)
+async def update_explorer(explorer_id: int, payload: ExplorerCreate) -> ExplorerGet:
+    try:
+        updated = await run_db(explorer_service.update_explorer, explorer_id, payload)
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if updated is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Explorer not found")
     return updated
 
 
 @router.delete("/{explorer_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_explorer(explorer_id: int, conn=Depends(get_db_connection)) -> Response:
-    deleted = explorer_service.delete_explorer(conn, explorer_id)
+async def delete_explorer(explorer_id: int) -> Response:
+    try:
+        deleted = await run_db(explorer_service.delete_explorer, explorer_id)
+    except sqlite3.IntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Explorer not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,59 @@
+"""HTTP helpers for paginated and streamed list endpoints."""
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from data.database import pool
+from services import listing
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# OpenAPI description of the headers ``page_response`` sets.
+PAGE_HEADERS = {
+    "Link": {
+        "description": 'URL of the next page as `<url>; rel="next"`; absent on the last page',
+        "schema": {"type": "string"},
+    },
+    "X-Next-Cursor": {
+        "description": "Cursor for the next page; absent on the last page",
+        "schema": {"type": "integer"},
+    },
+}
+
+
+def columns_or_400(fields: Optional[str], columns: Sequence[str]) -> List[str]:
+    try:
+        return listing.select_columns(fields, columns)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+def page_response(
+    request: Request,
+    rows: List[Dict[str, object]],
+    next_cursor: Optional[int],
+    cursor_param: str = "after",
+    headers: Optional[Dict[str, str]] = None,
+) -> JSONResponse:
+    """The page as a JSON array; the next page is linked via ``Link`` / ``X-Next-Cursor`` headers.
+
+    Rows are returned as-is rather than through ``response_model``, so projected
+    pages are not validated and no Pydantic object is built per row.
+    """
+    headers = dict(headers or {})
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(**{cursor_param: next_cursor})
+        headers.update({"Link": f'<{next_url}>; rel="next"', "X-Next-Cursor": str(next_cursor)})
+    return JSONResponse(rows, headers=headers)
+
+
+def ndjson_response(export: Callable[..., Iterator[bytes]], columns: Sequence[str]) -> StreamingResponse:
+    """Stream ``export(conn, columns)`` while holding one pooled connection for the whole export."""
+
+    def body() -> Iterator[bytes]:
+        with pool.connection() as conn:
+            yield from export(conn, columns)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
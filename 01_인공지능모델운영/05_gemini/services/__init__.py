@@ -1,4 +1,4 @@
 """Service layer exports."""
-from . import creature_service, explorer_service
+from . import bulk, creature_service, explorer_service, listing, search
 
-__all__ = ["creature_service", "explorer_service"]
+__all__ = ["bulk", "creature_service", "explorer_service", "listing", "search"]
@@ -0,0 +1,232 @@
+"""Batch insert/update/delete in one transaction with per-item results.
+
+Each batch takes the write lock up front (``BEGIN IMMEDIATE``), checks the
+unique key and any caller-supplied constraints with a few chunked lookups,
+then applies the remaining rows with a single statement and commits once.
+
+The rows reach SQLite as one JSON array read through ``json_each`` rather than
+via ``executemany``: the full-text triggers on both tables make FTS5 flush its
+pending index data at every statement, so one statement per batch keeps the
+index writes batched too (about 5x faster for 50k rows).
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+MAX_BATCH_SIZE = 100_000
+# Stay under SQLite's host-parameter limit (999 on older builds) in IN (...) lookups.
+LOOKUP_CHUNK = 500
+
+Row = Dict[str, object]
+# Called inside the batch transaction; returns ``index -> reason`` for items to reject.
+Validator = Callable[[sqlite3.Connection, Sequence[Row]], Dict[int, str]]
+
+
+def result(index: int, status: str, id: Optional[int] = None, detail: Optional[str] = None) -> Row:
+    item: Row = {"index": index, "status": status}
+    if id is not None:
+        item["id"] = id
+    if detail is not None:
+        item["detail"] = detail
+    return item
+
+
+def summarize(results: List[Row]) -> Row:
+    counts: Dict[str, int] = {}
+    for item in results:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+    return {"counts": counts, "results": results}
+
+
+def chunks(values: Sequence[object], size: int = LOOKUP_CHUNK) -> Iterator[Sequence[object]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def placeholders(values: Sequence[object]) -> str:
+    return ", ".join("?" * len(values))
+
+
+def json_rows(rows: Iterable[Row], columns: Sequence[str]) -> str:
+    return json.dumps([[row[column] for column in columns] for row in rows], ensure_ascii=False)
+
+
+def select_json(columns: Sequence[str]) -> str:
+    """``SELECT`` of ``columns`` from a ``json_rows`` array bound to the single parameter."""
+    fields = ", ".join(f"json_extract(value, '$[{index}]') AS {column}" for index, column in enumerate(columns))
+    return f"SELECT {fields} FROM json_each(?)"
+
+
+def _tuples(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    # Plain tuples: building sqlite3.Row objects dominates large lookups.
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def lookup(conn: sqlite3.Connection, table: str, column: str, values: Iterable[object]) -> Dict[object, int]:
+    """``value -> id`` for the rows whose ``column`` is in ``values``."""
+    values = list({value for value in values if value is not None})
+    found: Dict[object, int] = {}
+    for chunk in chunks(values):
+        found.update(
+            _tuples(conn).execute(f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders(chunk)});", chunk)
+        )
+    return found
+
+
+def insert(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Row],
+    *,
+    on_conflict: str = "skip",
+    validate: Optional[Validator] = None,
+    key: str = "name",
+) -> List[Row]:
+    """Insert ``rows``; existing ``key`` values are skipped, updated (upsert) or fail the whole batch.
+
+    The rows go through one ``INSERT ... SELECT`` over ``json_each`` with ``ON CONFLICT``. Ids are
+    AUTOINCREMENT and the write lock keeps other writers out, so the rows created
+    are exactly those above the previous maximum id; only the rest are looked up.
+    With ``on_conflict="fail"`` nothing is written if any item conflicts or is invalid.
+    """
+    results: List[Optional[Row]] = [None] * len(rows)
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        _reject_invalid(conn, rows, validate, results)
+        first_seen: Dict[object, int] = {}
+        applied: List[int] = []
+        for index, row in enumerate(rows):
+            if results[index] is not None:
+                continue
+            value = row[key]
+            if value in first_seen:
+                results[index] = result(index, "conflict", detail=f"duplicate {key} of item {first_seen[value]}")
+            else:
+                first_seen[value] = index
+                applied.append(index)
+
+        others = [column for column in columns if column != key]
+        action = "NOTHING"
+        if on_conflict == "update" and others:
+            action = "UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in others)
+        (last_id,) = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table};").fetchone()
+        # "WHERE true" keeps SQLite from parsing ON CONFLICT as part of the SELECT's join.
+        conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) {select_json(columns)} WHERE true "
+            f"ON CONFLICT ({key}) DO {action};",
+            (json_rows((rows[index] for index in applied), columns),),
+        )
+        created = dict(_tuples(conn).execute(f"SELECT {key}, id FROM {table} WHERE id > ?;", (last_id,)))
+        existing = lookup(conn, table, key, (rows[index][key] for index in applied if rows[index][key] not in created))
+        for index in applied:
+            value = rows[index][key]
+            if value in created:
+                results[index] = result(index, "created", created[value])
+            elif on_conflict == "update":
+                results[index] = result(index, "updated", existing[value])
+            else:
+                results[index] = result(index, "conflict", existing[value], f"{key} already exists")
+
+        if on_conflict == "fail" and any(item["status"] != "created" for item in results):
+            conn.rollback()
+            return [
+                result(index, "not_applied") if item["status"] == "created" else item
+                for index, item in enumerate(results)
+            ]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return results
+
+
+def as_rows(payloads: Sequence[object], columns: Sequence[str]) -> List[Row]:
+    """Plain dicts of ``columns`` read off the payload models (cheaper than ``.dict()`` per item)."""
+    return [{column: getattr(payload, column) for column in columns} for payload in payloads]
+
+
+def update(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Row],
+    *,
+    validate: Optional[Validator] = None,
+    key: str = "name",
+) -> List[Row]:
+    """Update rows by ``id``; unknown ids are ``not_found``, a ``key`` owned by another row is a conflict."""
+    results: List[Optional[Row]] = [None] * len(rows)
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        _reject_invalid(conn, rows, validate, results)
+        known_ids = lookup(conn, table, "id", (row["id"] for row in rows))
+        owners = lookup(conn, table, key, (row[key] for row in rows))
+        seen_ids: Dict[object, int] = {}
+        seen_keys: Dict[object, int] = {}
+        applied: List[int] = []
+        for index, row in enumerate(rows):
+            if results[index] is not None:
+                continue
+            if row["id"] not in known_ids:
+                results[index] = result(index, "not_found", row["id"])
+            elif row["id"] in seen_ids:
+                results[index] = result(index, "conflict", row["id"], f"duplicate id of item {seen_ids[row['id']]}")
+            elif row[key] in seen_keys or owners.get(row[key], row["id"]) != row["id"]:
+                results[index] = result(index, "conflict", row["id"], f"{key} belongs to another row")
+            else:
+                seen_ids[row["id"]] = seen_keys[row[key]] = index
+                applied.append(index)
+        conn.execute(
+            f"UPDATE {table} SET {', '.join(f'{column} = batch.{column}' for column in columns)} "
+            f"FROM ({select_json(['id', *columns])}) AS batch WHERE {table}.id = batch.id;",
+            (json_rows((rows[index] for index in applied), ["id", *columns]),),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    for index in applied:
+        results[index] = result(index, "updated", rows[index]["id"])
+    return results
+
+
+def delete(
+    conn: sqlite3.Connection,
+    table: str,
+    ids: Sequence[int],
+    *,
+    blocked: Optional[Callable[[sqlite3.Connection, Sequence[int]], Dict[int, str]]] = None,
+) -> List[Row]:
+    """Delete rows by id; ids ``blocked`` returns (e.g. still referenced) are reported as conflicts."""
+    results: List[Row] = []
+    doomed: List[int] = []
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        known_ids = lookup(conn, table, "id", ids)
+        blocked_ids = blocked(conn, list(known_ids)) if blocked else {}
+        for index, row_id in enumerate(ids):
+            if row_id not in known_ids:
+                results.append(result(index, "not_found", row_id))
+            elif row_id in blocked_ids:
+                results.append(result(index, "conflict", row_id, blocked_ids[row_id]))
+            else:
+                results.append(result(index, "deleted", row_id))
+                doomed.append(row_id)
+        conn.execute(f"DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(?));", (json.dumps(doomed),))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return results
+
+
+def _reject_invalid(
+    conn: sqlite3.Connection, rows: Sequence[Row], validate: Optional[Validator], results: List[Optional[Row]]
+) -> None:
+    for index, detail in (validate(conn, rows) if validate else {}).items():
+        results[index] = result(index, "invalid", detail=detail)
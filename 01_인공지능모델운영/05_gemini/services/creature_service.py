@@ -1,16 +1,37 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from models.creature import CreatureCreate, CreatureGet
+from services import bulk, listing, search
 
+TABLE = "creatures"
+COLUMNS = ("id", "name", "habitat", "description")
+# bm25 weights of the full-text columns (data.database.FULL_TEXT_INDEXES): name matches rank first.
+SEARCH_WEIGHTS = (10.0, 2.0, 1.0)
 
-def list_creatures(conn: sqlite3.Connection) -> List[CreatureGet]:
-    rows = conn.execute(
-        "SELECT id, name, habitat, description FROM creatures ORDER BY id;"
-    ).fetchall()
-    return [CreatureGet(**dict(row)) for row in rows]
+
+def list_creatures(
+    conn: sqlite3.Connection,
+    *,
+    after_id: int = 0,
+    limit: int = listing.DEFAULT_PAGE_SIZE,
+    columns: Sequence[str] = COLUMNS,
+) -> Tuple[List[Dict[str, object]], Optional[int]]:
+    """One keyset page of creatures (plain dicts of ``columns``) and the next cursor."""
+    return listing.page(conn, TABLE, columns, after_id=after_id, limit=limit)
+
+
+def export_creatures(conn: sqlite3.Connection, columns: Sequence[str] = COLUMNS) -> Iterator[bytes]:
+    return listing.export_ndjson(conn, TABLE, columns)
+
+
+def search_creatures(
+    conn: sqlite3.Connection, text: str, *, offset: int = 0, limit: int = search.DEFAULT_RESULTS
+) -> Tuple[List[Dict[str, object]], Optional[int], bool]:
+    """Creatures matching ``text`` by relevance, with ``score`` and a highlighted ``snippet``."""
+    return search.search(conn, TABLE, COLUMNS, SEARCH_WEIGHTS, text, offset=offset, limit=limit)
 
 
 def get_creature(conn: sqlite3.Connection, creature_id: int) -> Optional[CreatureGet]:
@@ -52,3 +73,49 @@ def delete_creature(conn: sqlite3.Connection, creature_id: int) -> bool:
     cursor = conn.execute("DELETE FROM creatures WHERE id = ?;", (creature_id,))
     conn.commit()
     return cursor.rowcount > 0
+
+
+def bulk_create_creatures(
+    conn: sqlite3.Connection, payloads: Sequence[CreatureCreate], on_conflict: str = "skip"
+) -> List[Dict[str, object]]:
+    """Insert many creatures in one transaction; ``on_conflict="update"`` upserts by name."""
+    return bulk.insert(conn, TABLE, COLUMNS[1:], bulk.as_rows(payloads, COLUMNS[1:]), on_conflict=on_conflict)
+
+
+def bulk_update_creatures(conn: sqlite3.Connection, payloads: Sequence[CreatureGet]) -> List[Dict[str, object]]:
+    rows = bulk.as_rows(payloads, COLUMNS)
+    return bulk.update(conn, TABLE, COLUMNS[1:], rows, validate=_blocked_renames)
+
+
+def bulk_delete_creatures(conn: sqlite3.Connection, creature_ids: Sequence[int]) -> List[Dict[str, object]]:
+    return bulk.delete(conn, TABLE, creature_ids, blocked=_blocked_deletes)
+
+
+def _referenced_names(conn: sqlite3.Connection, creature_ids: Sequence[int]) -> Dict[int, str]:
+    """``id -> name`` of the given creatures that some explorer has as favorite_creature."""
+    found: Dict[int, str] = {}
+    for chunk in bulk.chunks(list(creature_ids)):
+        found.update(
+            conn.execute(
+                f"""
+                SELECT c.id, c.name FROM creatures AS c
+                WHERE c.id IN ({bulk.placeholders(chunk)})
+                  AND EXISTS (SELECT 1 FROM explorers AS e WHERE e.favorite_creature = c.name);
+                """,
+                chunk,
+            ).fetchall()
+        )
+    return found
+
+
+def _blocked_renames(conn: sqlite3.Connection, rows: Sequence[Dict[str, object]]) -> Dict[int, str]:
+    referenced = _referenced_names(conn, [row["id"] for row in rows])
+    return {
+        index: "renaming a creature that explorers reference"
+        for index, row in enumerate(rows)
+        if row["id"] in referenced and referenced[row["id"]] != row["name"]
+    }
+
+
+def _blocked_deletes(conn: sqlite3.Connection, creature_ids: Sequence[int]) -> Dict[int, str]:
+    return {creature_id: "referenced by explorers" for creature_id in _referenced_names(conn, creature_ids)}
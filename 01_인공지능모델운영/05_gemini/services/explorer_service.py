@@ -1,16 +1,37 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from models.explorer import ExplorerCreate, ExplorerGet
+from services import bulk, listing, search
 
+TABLE = "explorers"
+COLUMNS = ("id", "name", "specialty", "favorite_creature")
+# bm25 weights for name and specialty.
+SEARCH_WEIGHTS = (10.0, 2.0)
 
-def list_explorers(conn: sqlite3.Connection) -> List[ExplorerGet]:
-    rows = conn.execute(
-        "SELECT id, name, specialty, favorite_creature FROM explorers ORDER BY id;"
-    ).fetchall()
-    return [ExplorerGet(**dict(row)) for row in rows]
+
+def list_explorers(
+    conn: sqlite3.Connection,
+    *,
+    after_id: int = 0,
+    limit: int = listing.DEFAULT_PAGE_SIZE,
+    columns: Sequence[str] = COLUMNS,
+) -> Tuple[List[Dict[str, object]], Optional[int]]:
+    """One keyset page of explorers (plain dicts of ``columns``) and the next cursor."""
+    return listing.page(conn, TABLE, columns, after_id=after_id, limit=limit)
+
+
+def export_explorers(conn: sqlite3.Connection, columns: Sequence[str] = COLUMNS) -> Iterator[bytes]:
+    return listing.export_ndjson(conn, TABLE, columns)
+
+
+def search_explorers(
+    conn: sqlite3.Connection, text: str, *, offset: int = 0, limit: int = search.DEFAULT_RESULTS
+) -> Tuple[List[Dict[str, object]], Optional[int], bool]:
+    """Explorers matching ``text`` by relevance, with ``score`` and a highlighted ``snippet``."""
+    return search.search(conn, TABLE, COLUMNS, SEARCH_WEIGHTS, text, offset=offset, limit=limit)
 
 
 def get_explorer(conn: sqlite3.Connection, explorer_id: int) -> Optional[ExplorerGet]:
@@ -52,3 +73,30 @@ def delete_explorer(conn: sqlite3.Connection, explorer_id: int) -> bool:
     cursor = conn.execute("DELETE FROM explorers WHERE id = ?;", (explorer_id,))
     conn.commit()
     return cursor.rowcount > 0
+
+
+def bulk_create_explorers(
+    conn: sqlite3.Connection, payloads: Sequence[ExplorerCreate], on_conflict: str = "skip"
+) -> List[Dict[str, object]]:
+    """Insert many explorers in one transaction; ``on_conflict="update"`` upserts by name."""
+    rows = bulk.as_rows(payloads, COLUMNS[1:])
+    return bulk.insert(conn, TABLE, COLUMNS[1:], rows, on_conflict=on_conflict, validate=_unknown_favorites)
+
+
+def bulk_update_explorers(conn: sqlite3.Connection, payloads: Sequence[ExplorerGet]) -> List[Dict[str, object]]:
+    rows = bulk.as_rows(payloads, COLUMNS)
+    return bulk.update(conn, TABLE, COLUMNS[1:], rows, validate=_unknown_favorites)
+
+
+def bulk_delete_explorers(conn: sqlite3.Connection, explorer_ids: Sequence[int]) -> List[Dict[str, object]]:
+    return bulk.delete(conn, TABLE, explorer_ids)
+
+
+def _unknown_favorites(conn: sqlite3.Connection, rows: Sequence[Dict[str, object]]) -> Dict[int, str]:
+    """Rows whose favorite_creature would violate the foreign key to creatures(name)."""
+    known = bulk.lookup(conn, "creatures", "name", (row["favorite_creature"] for row in rows))
+    return {
+        index: f"unknown favorite_creature {row['favorite_creature']!r}"
+        for index, row in enumerate(rows)
+        if row["favorite_creature"] is not None and row["favorite_creature"] not in known
+    }
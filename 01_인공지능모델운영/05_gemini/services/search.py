@@ -0,0 +1,85 @@
+"""Ranked full-text search over the FTS5 indexes created by ``data.database``."""
+from __future__ import annotations
+
+import html
+import re
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 100
+MAX_TERMS = 8
+SNIPPET_TOKENS = 16
+# Only the newest matches are ranked: ranking costs grow with every matching
+# row, so a word common to most of the table would otherwise rank them all.
+# Results are flagged ``truncated`` when older matches were left out.
+MAX_CANDIDATES = 1000
+
+_TERM = re.compile(r"\w+")
+# Control characters cannot occur in indexed tokens, so they mark the matches
+# until the snippet has been HTML-escaped.
+_OPEN, _CLOSE = "\x02", "\x03"
+
+
+def match_expression(text: str) -> str:
+    """FTS5 query for free text: every word must match, the last one as a prefix (search as you type).
+
+    Words are quoted, so operators and punctuation typed by users are never parsed
+    as FTS5 syntax. Raises ``ValueError`` when no searchable word is left.
+    """
+    terms = _TERM.findall(text)[:MAX_TERMS]
+    if not terms:
+        raise ValueError("Search query has no searchable words")
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def search(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    weights: Sequence[float],
+    text: str,
+    *,
+    offset: int = 0,
+    limit: int = DEFAULT_RESULTS,
+) -> Tuple[List[Dict[str, object]], Optional[int], bool]:
+    """``(rows, next_offset, truncated)``: rows of ``table`` matching ``text``, best bm25 score first.
+
+    ``weights`` are the bm25 weights of the indexed columns, in index order. Each row
+    carries ``score`` (lower is better) and ``snippet``, HTML-escaped with the
+    matched words wrapped in ``<mark>``. ``next_offset`` is None on the last page.
+    Only the newest ``MAX_CANDIDATES`` matches are ranked; ``truncated`` is True
+    when there are more, so a narrower query may find better ones.
+    """
+    fts = f"{table}_fts"
+    expression = match_expression(text)
+    limit = max(0, min(limit, MAX_CANDIDATES - offset))
+    rows = conn.execute(
+        f"""
+        SELECT {', '.join(f't.{column}' for column in columns)}, hit.score, hit.snippet
+        FROM (
+            SELECT rowid AS id,
+                   bm25({fts}, {', '.join(str(float(weight)) for weight in weights)}) AS score,
+                   snippet({fts}, -1, ?, ?, '…', ?) AS snippet
+            FROM {fts}
+            WHERE {fts} MATCH ?
+            ORDER BY rowid DESC
+            LIMIT ?
+        ) AS hit
+        JOIN {table} AS t ON t.id = hit.id
+        ORDER BY hit.score
+        LIMIT ? OFFSET ?;
+        """,
+        (_OPEN, _CLOSE, SNIPPET_TOKENS, expression, MAX_CANDIDATES, limit + 1, offset),
+    ).fetchall()
+    # Walking the match list is cheap next to ranking it; this only checks that one more exists.
+    truncated = conn.execute(
+        f"SELECT 1 FROM {fts} WHERE {fts} MATCH ? LIMIT 1 OFFSET ?;", (expression, MAX_CANDIDATES)
+    ).fetchone() is not None
+    hits = []
+    for row in rows[:limit]:
+        hit = dict(row)
+        hit["score"] = round(hit["score"], 4)
+        hit["snippet"] = html.escape(hit["snippet"]).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+        hits.append(hit)
+    return hits, offset + limit if len(rows) > limit else None, truncated